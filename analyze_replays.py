@@ -0,0 +1,43 @@
+from argparse import ArgumentParser
+import time
+
+from src.replay_analytics import analyze_directory, FORMATS
+
+"""
+Extracts per-turn metrics (units, damage, income, time remaining, ...) from every replay in a directory
+Sample usage: python3 analyze_replays.py replays -o replays/stats
+"""
+def main():
+
+    parser = ArgumentParser()
+
+    parser.add_argument("replay_dir", type=str)
+
+    parser.add_argument(
+        "-o", "--output_dir", type=str, required=False, default="replays/stats"
+    )
+
+    parser.add_argument(
+        "-f", "--format",
+        type=str,
+        choices=FORMATS,
+        default="npz",
+        help="npz: one NumPy array per column, csv: one row per turn",
+    )
+
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: one per CPU)",
+    )
+
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    summary = analyze_directory(args.replay_dir, args.output_dir, args.format, args.workers)
+    print(f"Analyzed {len(summary)} replays into {args.output_dir} in {time.perf_counter() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
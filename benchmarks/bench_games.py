@@ -0,0 +1,221 @@
+'''
+Whole-game engine throughput benchmark
+
+Plays a fixed set of bot matchups on every map in maps/ for a fixed number of turns with a fixed seed,
+and reports turns/sec, peak RSS and replay size per game. Results are stored as JSON and can be compared
+against a saved baseline; the run fails (exit code 1) if any game regresses by more than the threshold.
+
+Sample usage (from the repository root):
+    python3 -m benchmarks.bench_games --turns 300 -o benchmarks/results/latest.json
+    python3 -m benchmarks.bench_games --turns 300 --baseline benchmarks/results/baseline.json --threshold 0.15
+'''
+
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import Dict, List, Tuple
+
+
+# (blue bot, red bot) pairs played on every map
+MATCHUPS: List[Tuple[str, str]] = [
+    ("nothing_bot", "nothing_bot"),
+    ("attack_bot_v1", "nothing_bot"),
+    ("attack_bot_v1", "attack_bot_v1"),
+    ("def_and_farm_final", "attack_bot_v1"),
+    ("def_and_farm_final", "def_and_farm_final"),
+]
+
+DEFAULT_TURNS = 300
+DEFAULT_SEED = 0
+DEFAULT_THRESHOLD = 0.10
+
+# metric -> True if higher is better
+METRICS: Dict[str, bool] = {
+    "turns_per_sec": True,
+    "peak_rss_kb": False,
+    "replay_bytes": False,
+}
+
+
+def peak_rss_kb() -> int:
+    '''Peak resident set size of the current process in KiB'''
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports KiB, macOS reports bytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def play_game(map_path: str, blue_bot: str, red_bot: str, turns: int, seed: int) -> Dict:
+    '''
+    Plays a single game and measures it. Runs in a fresh worker process so that peak RSS is per game.
+    '''
+
+    from src.game import Game
+
+    result = {
+        "map": os.path.basename(map_path).split(".")[0],
+        "blue": blue_bot,
+        "red": red_bot,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        replay_path = os.path.join(tmp_dir, "replay.awap25r")
+
+        #bots print a lot; keep the benchmark output readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            try:
+                game = Game(
+                    blue_path=f"bots/{blue_bot}.py", red_path=f"bots/{red_bot}.py", map_path=map_path, output_path=replay_path, seed=seed
+                )
+                game.turn_limit = turns
+
+                start = time.perf_counter()
+                game.run_game()
+                seconds = time.perf_counter() - start
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                return result
+
+        played = game.game_state.turn
+
+        result.update({
+            "turns": played,
+            "seconds": seconds,
+            "turns_per_sec": played / seconds if seconds > 0 else 0.0,
+            "peak_rss_kb": peak_rss_kb(),
+            "replay_bytes": os.path.getsize(replay_path) if os.path.exists(replay_path) else 0,
+            "winner": game.winner,
+        })
+
+    return result
+
+
+def run_benchmarks(map_paths: List[str], matchups: List[Tuple[str, str]], turns: int, seed: int, repeat: int = 1) -> Dict:
+    '''
+    Plays every matchup on every map, one game per fresh process, sequentially to keep timings quiet
+    With repeat > 1, each game is played several times and the run with the median turns/sec is kept
+    '''
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+
+    with ctx.Pool(processes=1, maxtasksperchild=1) as pool:
+        for map_path in map_paths:
+            for blue_bot, red_bot in matchups:
+                runs = [pool.apply(play_game, (map_path, blue_bot, red_bot, turns, seed)) for _ in range(repeat)]
+                runs.sort(key=lambda res: res.get("turns_per_sec", 0.0))
+                res = runs[len(runs) // 2]
+
+                results.append(res)
+                print_result(res)
+
+    return {
+        "meta": {
+            "turns": turns,
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def result_key(res: Dict) -> Tuple[str, str, str]:
+    return res["map"], res["blue"], res["red"]
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    '''
+    Compares current results against a baseline
+    Returns a list of human readable regressions (empty if none)
+    '''
+
+    base_results = {result_key(res): res for res in baseline["results"]}
+    regressions = []
+
+    for res in current["results"]:
+        base = base_results.get(result_key(res))
+        if base is None or "error" in res or "error" in base:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            new, old = res[metric], base[metric]
+            if old <= 0:
+                continue
+
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f'{"/".join(result_key(res))}: {metric} {old:.1f} -> {new:.1f} ({change:+.1%})')
+
+    return regressions
+
+
+def print_result(res: Dict):
+    name = f'{res["map"]:<24} {res["blue"]:>20} vs {res["red"]:<20}'
+    if "error" in res:
+        print(f'{name} ERROR {res["error"]}')
+        return
+
+    print(
+        f'{name} {res["turns"]:>5} turns  {res["turns_per_sec"]:9.1f} turns/s  '
+        f'{res["peak_rss_kb"] / 1024:7.1f} MiB peak  {res["replay_bytes"] / 1024:9.1f} KiB replay'
+    )
+
+
+def main():
+
+    parser = ArgumentParser(description="Engine throughput benchmark over all bundled maps")
+
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS, help="turn limit per game")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=1, help="play each game this many times and keep the median")
+    parser.add_argument("--maps", type=str, nargs="*", default=None, help="map names or map files (default: every map in maps/)")
+    parser.add_argument("-o", "--output_file", type=str, default=None, help="where to store the JSON results")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative regression before failing (0.1 = 10%%)"
+    )
+
+    args = parser.parse_args()
+
+    if args.maps:
+        #map names from maps/, or paths to any map file (ie one made by generate_map.py)
+        map_paths = [
+            name if os.path.exists(name) else f"maps/{name}.awap25m" if not name.endswith(".awap25m") else f"maps/{name}"
+            for name in args.maps
+        ]
+    else:
+        map_paths = sorted(glob.glob("maps/*.awap25m"))
+
+    results = run_benchmarks(map_paths, MATCHUPS, args.turns, args.seed, args.repeat)
+
+    if args.output_file:
+        os.makedirs(os.path.dirname(args.output_file) or ".", exist_ok=True)
+        with open(args.output_file, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+'''
+Microbenchmarks for RobotController / GameState hot paths
+
+Times individual engine calls against synthetic game states with 10, 100 and 1000 units per team
+on 20x20 and 100x100 maps, and prints how each call scales with the army size. A call whose cost
+grows much faster than the army (ie O(n^2)) is flagged; with --check_scaling the run then fails.
+
+Sample usage (from the repository root):
+    python3 -m benchmarks.bench_hot_paths
+    python3 -m benchmarks.bench_hot_paths --sizes 100 --units 10 100 1000 -o benchmarks/results/hot_paths.json --check_scaling
+    python3 -m benchmarks.bench_hot_paths --sizes 500 --units 500 5000    # stress test
+'''
+
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from typing import Callable, Dict, List, Tuple
+
+from src.game_constants import Team, Direction
+from src.game_state import GameState
+from src.map_generator import generate_map, seed_units
+from src.map_processor import process_map
+from src.robot_controller import RobotController
+
+
+DEFAULT_SIZES = [20, 100]
+DEFAULT_UNITS = [10, 100, 1000]
+
+# at most this fraction of the map is filled with units
+MAX_FILL = 0.5
+
+# flag a call if its cost grows more than this many times faster than the army
+SCALING_LIMIT = 3.0
+
+
+def make_state(map_file: str, units_per_team: int, seed: int = 0) -> GameState:
+    '''Loads a map and seeds it with units_per_team knights per team at random cells'''
+
+    state = GameState(process_map(map_file))
+    seed_units(state, units_per_team, seed=seed)
+
+    # units cannot move or act on the turn they spawn
+    state.start_turn()
+    return state
+
+
+def hot_paths(state: GameState, map_file: str) -> Dict[str, Callable[[], object]]:
+    '''Returns {benchmark name: zero argument callable} over the given state'''
+
+    rc = RobotController(Team.BLUE, state)
+    enemy = Team.RED
+
+    unit_id = next(iter(state.units[Team.BLUE]))
+    unit = state.units[Team.BLUE][unit_id]
+
+    # the attacker never kills, never dies and never runs out of actions, so the state stays fixed
+    unit.damage = 0
+    unit.health = 10 ** 9
+    unit.turn_actions_remaining = 10 ** 9
+
+    center = state.map.width // 2
+
+    rc.get_threat_map() # creates the game state's threat map
+
+    return {
+        "sense_units_within_radius": lambda: rc.sense_units_within_radius(enemy, center, center, 5),
+        "can_move_unit_in_direction": lambda: rc.can_move_unit_in_direction(unit_id, Direction.UP),
+        "all_reachable_cells": lambda: rc.all_reachable_cells(),
+        "unit_attack_location": lambda: rc.unit_attack_location(unit_id, unit.x, unit.y),
+        "all_attack_options": lambda: rc.all_attack_options(Team.BLUE),
+        "ThreatMap.rebuild": lambda: state.threat_map.rebuild(),
+        "get_units": lambda: rc.get_units(enemy),
+        "GameState.to_dict": lambda: state.to_dict(),
+        "process_map": lambda: process_map(map_file),
+        # last, since it resets the attacker's actions
+        "GameState.start_turn": lambda: state.start_turn(),
+    }
+
+
+def time_call(func: Callable[[], object], min_time: float) -> float:
+    '''Returns the best seconds per call over 3 rounds of at least min_time each'''
+
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def run_benchmarks(sizes: List[int], unit_counts: List[int], min_time: float) -> List[Dict]:
+    '''Times every hot path for every (map size, units per team) combination that fits on the map'''
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            map_file = os.path.join(tmp_dir, f"grass_{size}.awap25m")
+            generate_map(map_file, size, size, water=0, mountain=0, sand=0)
+
+            for units in unit_counts:
+                if 2 * units > MAX_FILL * size * size:
+                    print(f"skipping {units} units per team on {size}x{size}: does not fit")
+                    continue
+
+                state = make_state(map_file, units)
+
+                #engine prints on some failed actions; keep the output readable
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    timings = {name: time_call(func, min_time) for name, func in hot_paths(state, map_file).items()}
+
+                for name, seconds in timings.items():
+                    results.append({"name": name, "size": size, "units": units, "seconds": seconds})
+                    print(f"{name:<28} {size:>4}x{size:<4} {units:>6} units/team  {seconds * 1e6:12.2f}us")
+
+    return results
+
+
+def scaling_report(results: List[Dict]) -> List[str]:
+    '''
+    Compares consecutive army sizes per (benchmark, map size)
+    Returns the calls whose cost grew more than SCALING_LIMIT times faster than the army
+    '''
+
+    series: Dict[Tuple[str, int], List[Tuple[int, float]]] = {}
+    for res in results:
+        series.setdefault((res["name"], res["size"]), []).append((res["units"], res["seconds"]))
+
+    flagged = []
+
+    print("\nscaling (cost growth / army growth, ~1 is linear, ~army growth is quadratic):")
+    for (name, size), points in sorted(series.items()):
+        points.sort()
+        for (n0, t0), (n1, t1) in zip(points, points[1:]):
+            factor = (t1 / t0) / (n1 / n0)
+            print(f"  {name:<28} {size:>4}x{size:<4} {n0:>5} -> {n1:<5} {factor:6.2f}")
+
+            if factor > SCALING_LIMIT:
+                flagged.append(f"{name} on {size}x{size}: {n0} -> {n1} units is {factor:.1f}x worse than linear")
+
+    return flagged
+
+
+def main():
+
+    parser = ArgumentParser(description="Microbenchmarks for engine hot paths")
+
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="map side lengths")
+    parser.add_argument("--units", type=int, nargs="*", default=DEFAULT_UNITS, help="units per team")
+    parser.add_argument("--min_time", type=float, default=0.2, help="minimum seconds per timing round")
+    parser.add_argument("-o", "--output_file", type=str, default=None, help="where to store the JSON results")
+    parser.add_argument("--check_scaling", action="store_true", help="exit with 1 if any call scales worse than linear")
+
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.units, args.min_time)
+    flagged = scaling_report(results)
+
+    if args.output_file:
+        os.makedirs(os.path.dirname(args.output_file) or ".", exist_ok=True)
+        with open(args.output_file, "w") as f:
+            json.dump({"results": results, "flagged": flagged}, f, indent=4)
+
+    if flagged:
+        print(f"\n{len(flagged)} call(s) scale worse than linear:")
+        for line in flagged:
+            print(f"  {line}")
+
+        if args.check_scaling:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,6 @@ from src.game_constants import Team, Tile, GameConstants, Direction, BuildingTyp
 
 from src.units import Unit
 from src.buildings import Building
-import random
 
 class BotPlayer(Player):
     def __init__(self, map: Map):
@@ -19,12 +18,12 @@ class BotPlayer(Player):
         for i in range(self.map.width):
             for j in range(self.map.height):
                 if self.map.is_tile_type(i, j, Tile.WATER) or self.map.is_tile_type(i, j, Tile.BRIDGE):
-                    build_type = random.randint(1, 2)
+                    build_type = rc.get_random().randint(1, 2)
                     if build_type == 2:
                         if rc.can_build_building(BuildingType.PORT, i, j):
                             rc.build_building(BuildingType.PORT, i, j)
                 else:
-                    build_type = random.randint(1, 2)
+                    build_type = rc.get_random().randint(1, 2)
                     if build_type == 2:
                         if rc.can_build_building(BuildingType.EXPLORER_BUILDING, i, j):
                             rc.build_building(BuildingType.EXPLORER_BUILDING, i, j)
@@ -37,7 +36,7 @@ class BotPlayer(Player):
         for building in ally_buildings:
             if building.type == BuildingType.MAIN_CASTLE:
                 ally_castle_id = rc.get_id_from_building(building)[1]
-                unit_type = random.randint(1, 4)
+                unit_type = rc.get_random().randint(1, 4)
                 if unit_type == 1:
                     if rc.can_spawn_unit(UnitType.KNIGHT, ally_castle_id):
                         rc.spawn_unit(UnitType.KNIGHT, ally_castle_id)
@@ -52,7 +51,7 @@ class BotPlayer(Player):
                         rc.spawn_unit(UnitType.LAND_HEALER_1, ally_castle_id)
             if building.type == BuildingType.PORT:
                 ally_castle_id = rc.get_id_from_building(building)[1]
-                unit_type = random.randint(1, 3)
+                unit_type = rc.get_random().randint(1, 3)
                 if unit_type == 1:
                     if rc.can_spawn_unit(UnitType.SAILOR, ally_castle_id):
                         rc.spawn_unit(UnitType.SAILOR, ally_castle_id)
@@ -12,7 +12,6 @@ from src.game_constants import (
 
 from src.units import Unit
 from src.buildings import Building
-import random
 
 
 """This bot uses configurable proportions. Test out your unit compositions!"""
@@ -61,7 +60,7 @@ class BotPlayer(Player):
             engineers = sum(1 for u in units if u.type == UnitType.ENGINEER)
 
             # random choice based on proportions
-            roll = random.random()
+            roll = rc.get_random().random()
             if roll < KNIGHT_PROPORTION and rc.can_spawn_unit(
                 UnitType.KNIGHT, ally_castle_id
             ):
@@ -98,7 +97,7 @@ class BotPlayer(Player):
                     engineers.append(unit)
 
             # Heal units ocassionally
-            if random.random() < LAND_HEALER_PROPORTION and len(healers) > 0:
+            if rc.get_random().random() < LAND_HEALER_PROPORTION and len(healers) > 0:
                 for healer in healers:
                     if rc.can_heal_unit(unit_id, healer):
                         rc.heal_unit(unit_id, healer)
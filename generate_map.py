@@ -0,0 +1,30 @@
+from src.map_generator import generate_map, CASTLE_PLACEMENTS
+from argparse import ArgumentParser
+
+"""
+CLI for generating synthetic maps of arbitrary size, ie for stress testing
+Sample usage: python3 generate_map.py -o maps/stress_500.awap25m --width 500 --height 500 --water 0.15
+"""
+def main():
+
+    parser = ArgumentParser()
+
+    parser.add_argument("-o", "--output_file", type=str, required=True, help="map file to write (.awap25m)")
+    parser.add_argument("--width", type=int, required=False, default=100)
+    parser.add_argument("--height", type=int, required=False, default=100)
+
+    parser.add_argument("--water", type=float, required=False, default=0.1, help="fraction of water tiles")
+    parser.add_argument("--mountain", type=float, required=False, default=0.1, help="fraction of mountain tiles")
+    parser.add_argument("--sand", type=float, required=False, default=0.1, help="fraction of sand tiles")
+
+    parser.add_argument("--castles", type=str, required=False, default="corners", choices=CASTLE_PLACEMENTS, help="castle placement")
+    parser.add_argument("--seed", type=int, required=False, default=0)
+
+    args = parser.parse_args()
+
+    generate_map(args.output_file, args.width, args.height, args.water, args.mountain, args.sand, args.castles, args.seed)
+    print(f"Wrote {args.width}x{args.height} map to {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,48 @@
 '''replays the game using pygame given a replay file'''
+from argparse import ArgumentParser
+import time
+
+from src.frame_export import export_frames, FORMATS
+
+"""
+Renders a replay into image frames offline (no display needed)
+Sample usage: python3 replay_game.py replays/game_replay.awap25r -o replays/frames
+"""
+def main():
+
+    parser = ArgumentParser()
+
+    parser.add_argument("replay_file", type=str)
+
+    parser.add_argument(
+        "-o", "--output_dir", type=str, required=False, default="replays/frames"
+    )
+
+    parser.add_argument(
+        "-f", "--format",
+        type=str,
+        choices=FORMATS,
+        default="png",
+        help="png: compressed images, bmp: uncompressed images (several times faster to write), npy: raw (height, width, 3) uint8 NumPy arrays",
+    )
+
+    parser.add_argument("--start", type=int, default=0, help="First replay entry to render")
+    parser.add_argument("--end", type=int, default=None, help="Stop before this replay entry")
+    parser.add_argument("--step", type=int, default=1, help="Render every step-th entry, ie for timelapses")
+
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=None,
+        help="Number of rendering processes (default: one per CPU)",
+    )
+
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    frames = export_frames(args.replay_file, args.output_dir, args.format, args.start, args.end, args.step, args.workers)
+    print(f"Wrote {frames} frames to {args.output_dir} in {time.perf_counter() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 import sys
 import os
 import time
-import json
+import bisect
+from argparse import ArgumentParser
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.replay import ReplayStream, expand_entry
 
 """
-Displays a replay in the terminal via ASCII
+Displays a replay in the terminal via ASCII, streaming it turn by turn
 Sample usage: python3 replay_game_cli.py game_replay.awap25r
+
+Controls: space pause/resume, n step one turn, +/- speed up/down, j jump to a turn, q quit
 """
 # ANSI color codes
 COLOR_MAP = {
@@ -19,59 +25,265 @@ COLOR_MAP = {
     "RESET": "\033[0m",
 }
 
+# ANSI terminal control
+CLEAR_SCREEN = "\033[2J"
+CLEAR_LINE = "\033[K"
+HIDE_CURSOR = "\033[?25l"
+SHOW_CURSOR = "\033[?25h"
+
+
+def move_cursor(row: int, col: int) -> str:
+    '''1-based row and column'''
+    return f"\033[{row};{col}H"
+
+
+class KeyReader:
+    '''Non-blocking single key presses from the terminal (none if stdin is not a terminal)'''
+
+    def __init__(self):
+        self.interactive = sys.stdin.isatty()
+        self.saved_settings = None
+
+    def __enter__(self):
+        if self.interactive and os.name != "nt":
+            import termios
+            import tty
+            self.saved_settings = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin.fileno())
+        return self
+
+    def __exit__(self, *exc):
+        if self.saved_settings is not None:
+            import termios
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.saved_settings)
+
+    def read(self, timeout: Optional[float]) -> Optional[str]:
+        '''Waits up to timeout seconds (forever if None) for a key press; None if there was none'''
+
+        if not self.interactive:
+            if timeout is not None:
+                time.sleep(timeout)
+            return None
+
+        if os.name == "nt":
+            import msvcrt
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not msvcrt.kbhit():
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.01)
+            return msvcrt.getwch()
+
+        import select
+        ready, _, _ = select.select([sys.stdin], [], [], timeout)
+        return sys.stdin.read(1) if ready else None
+
+
+class TerminalView:
+    '''
+    Draws game states in place: the first frame is drawn in full, later frames only rewrite the cells
+    whose contents changed (units, buildings and bridges), so a frame costs O(units + buildings)
+    '''
+
+    def __init__(self, map_data: Dict, map_changes: Optional[Dict]):
+        self.width, self.height = map_data["width"], map_data["height"]
+
+        self.initial_tiles = map_data["tiles"]
+        map_changes = map_changes or {}
+        self.changed_turns: List[int] = map_changes.get("changed-turns", [])
+        self.changed_maps: List[List[List[str]]] = map_changes.get("changed-maps", [])
+
+        self.tiles = self.initial_tiles #tiles of the last frame
+        self.objects: Dict[Tuple[int, int], str] = {} #units and buildings of the last frame, by cell
+        self.drawn = False
+
+    def cell(self, x: int, y: int) -> str:
+        return self.objects.get((x, y)) or COLOR_MAP[self.tiles[x][y]] + " " + COLOR_MAP["RESET"]
+
+    def tiles_at(self, turn: int) -> List[List[str]]:
+        '''Tiles of the last map change made on or before a turn'''
+        change = bisect.bisect_right(self.changed_turns, turn) - 1
+        return self.changed_maps[change] if change >= 0 else self.initial_tiles
+
+    def draw(self, game_state: Dict, status: str):
+        objects = {}
+
+        # Place buildings
+        for team, buildings in game_state["buildings"].items():
+            for building in buildings:
+                objects[(building["x"], building["y"])] = COLOR_MAP[team] + "C" + COLOR_MAP["RESET"]
+
+        # Place units
+        for team, units in game_state["units"].items():
+            for unit in units:
+                objects[(unit["x"], unit["y"])] = COLOR_MAP[team] + "U" + COLOR_MAP["RESET"]
+
+        tiles = self.tiles_at(game_state["turn"])
+        out = []
+
+        if not self.drawn or tiles is not self.tiles:
+            self.tiles, self.objects = tiles, objects
+            out.append(CLEAR_SCREEN if not self.drawn else "")
+            for y in range(self.height):
+                out.append(move_cursor(y + 1, 1) + "".join(self.cell(x, y) for x in range(self.width)))
+            self.drawn = True
+        else:
+            changed = [pos for pos in objects.keys() | self.objects.keys() if objects.get(pos) != self.objects.get(pos)]
+            self.objects = objects
+            for x, y in changed:
+                out.append(move_cursor(y + 1, 2 * x + 1) + self.cell(x, y))
+
+        out.append(
+            move_cursor(self.height + 1, 1)
+            + f"Turn: {game_state['turn']}, Balance: BLUE {game_state['balance']['BLUE']} - RED {game_state['balance']['RED']}" + CLEAR_LINE
+        )
+        out.append(move_cursor(self.height + 2, 1) + status + CLEAR_LINE)
+
+        sys.stdout.write("".join(out))
+        sys.stdout.flush()
+
+
+class ReplayPlayer:
+    '''
+    Streams turns from a replay and plays them with pause, step, speed and jump controls
+
+    Entries are decoded as playback reaches them. The file offset of every entry seen so far is kept,
+    so jumping back restarts the stream at the last entry at or before the target turn.
+    '''
+
+    def __init__(self, stream: ReplayStream, view: TerminalView, keys: KeyReader, speed: float):
+        self.stream = stream
+        self.view = view
+        self.keys = keys
+        self.speed = speed #turns per second
+        self.paused = False
+
+        #turn number and file offset of every entry seen so far, in order
+        self.entry_turns: List[int] = []
+        self.entry_offsets: List[int] = []
+
+        self.frames = self.frames_from(None)
+        self.current: Optional[Dict] = None
+        self.finished = False
+
+    def frames_from(self, offset: Optional[int]) -> Iterator[Dict]:
+        '''The turns of the replay, one per turn (idle runs expanded), starting at an entry offset'''
+        for entry_offset, entry in self.stream.entries(offset):
+            if not self.entry_offsets or entry_offset > self.entry_offsets[-1]:
+                self.entry_turns.append(entry["turn_number"])
+                self.entry_offsets.append(entry_offset)
+            yield from expand_entry(entry)
+
+    def advance(self) -> bool:
+        '''Moves to the next turn; False at the end of the replay'''
+        step = next(self.frames, None)
+        if step is None:
+            self.finished = True
+            return False
+        self.current = step
+        return True
+
+    def jump(self, turn: int):
+        '''Moves to a turn (or the last one, if the replay is shorter)'''
+
+        if self.current is not None and turn < self.current["turn_number"]:
+            entry = max(bisect.bisect_right(self.entry_turns, turn) - 1, 0)
+            self.frames = self.frames_from(self.entry_offsets[entry])
+            self.current = None
+            self.finished = False
+
+        while self.current is None or self.current["turn_number"] < turn:
+            if not self.advance():
+                break
+
+    def status(self) -> str:
+        if self.finished:
+            state = f"Winner: {self.stream.header.get('winner_color')}"
+        elif self.paused:
+            state = "Paused"
+        else:
+            state = f"Playing at {self.speed:g} turns/s"
+        return f"{state} | space: pause, n: step, +/-: speed, j: jump, q: quit"
+
+    def draw(self):
+        self.view.draw(self.current["game_state"], self.status())
+
+    def read_turn(self) -> Optional[int]:
+        '''Reads a turn number typed after j, up to enter'''
 
-def clear_screen():
-    os.system("cls" if os.name == "nt" else "clear")
+        digits = ""
+        while True:
+            sys.stdout.write(move_cursor(self.view.height + 2, 1) + f"Jump to turn: {digits}" + CLEAR_LINE)
+            sys.stdout.flush()
 
+            key = self.keys.read(None)
+            if key is None or key == "\033":
+                return None
+            if key in ("\n", "\r"):
+                return int(digits) if digits else None
+            if key in ("\b", "\x7f"):
+                digits = digits[:-1]
+            elif key.isdigit():
+                digits += key
 
-def render_game_state(game_state, map_data):
-    width, height = map_data["width"], map_data["height"]
-    tiles = map_data["tiles"]
-    grid = [
-        [COLOR_MAP[tiles[y][x]] + " " + COLOR_MAP["RESET"] for x in range(width)]
-        for y in range(height)
-    ]
+    def play(self):
+        if self.current is None and not self.advance():
+            return
+        self.draw()
 
-    # Place buildings
-    for team, buildings in game_state["buildings"].items():
-        for building in buildings:
-            grid[building["y"]][building["x"]] = (
-                COLOR_MAP[team] + "C" + COLOR_MAP["RESET"]
-            )
+        while True:
+            waiting = self.paused or self.finished
+            if not self.keys.interactive and waiting:
+                return
 
-    # Place units
-    for team, units in game_state["units"].items():
-        for unit in units:
-            grid[unit["y"]][unit["x"]] = COLOR_MAP[team] + "U" + COLOR_MAP["RESET"]
+            key = self.keys.read(None if waiting else 1 / self.speed)
 
-    # Print the grid
-    for row in grid:
-        print("".join(row))
+            if key is None:
+                self.advance()
+            elif key == "q":
+                return
+            elif key == " ":
+                self.paused = not self.paused
+            elif key == "n":
+                self.paused = True
+                self.advance()
+            elif key in ("+", "="):
+                self.speed = min(self.speed * 2, 1000)
+            elif key == "-":
+                self.speed = max(self.speed / 2, 0.25)
+            elif key == "j":
+                turn = self.read_turn()
+                if turn is not None:
+                    self.paused = True
+                    self.jump(turn)
 
-    print(
-        f"Turn: {game_state['turn']}, Balance: BLUE {game_state['balance']['BLUE']} - RED {game_state['balance']['RED']}"
-    )
+            self.draw()
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 replay_game_cli.py <replay_file>")
-        return
+    parser = ArgumentParser()
+    parser.add_argument("replay_file", type=str)
+    parser.add_argument("-s", "--speed", type=float, default=10, help="Turns per second (+/- while playing)")
+    parser.add_argument("-t", "--turn", type=int, default=None, help="Start at this turn")
+    args = parser.parse_args()
 
-    replay_file = sys.argv[1]
-    with open(replay_file, "r") as f:
-        data = json.load(f)
+    if os.name == "nt":
+        os.system("")  # enables ANSI escape codes in the Windows console
 
-    map_data = data["map"]
-    replay = data["replay"]
+    with ReplayStream(args.replay_file) as stream, KeyReader() as keys:
+        view = TerminalView(stream.header["map"], stream.header.get("map-changes"))
+        player = ReplayPlayer(stream, view, keys, args.speed)
 
-    for step in replay:
-        clear_screen()
-        print(f"Turn {step['turn_number']}")
-        render_game_state(step["game_state"], map_data)
-        time.sleep(1)
+        sys.stdout.write(HIDE_CURSOR)
+        try:
+            if args.turn is not None:
+                player.jump(args.turn)
+            player.play()
+        finally:
+            sys.stdout.write(COLOR_MAP["RESET"] + move_cursor(view.height + 3, 1) + SHOW_CURSOR)
+            sys.stdout.flush()
 
-    print(f"Winner: {data['winner_color']}")
+    print(f"Winner: {stream.header.get('winner_color')}")
 
 
 if __name__ == "__main__":
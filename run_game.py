@@ -1,4 +1,5 @@
 from src.game import Game
+from src.adjudicator import AdjudicationRules
 from argparse import ArgumentParser
 import json
 
@@ -31,6 +32,48 @@ def main():
         "-o", "--output_file", type=str, required=False, default="replays/game_replay.awap25r" # AWAP format (used for CLI view)
     )
 
+    parser.add_argument(
+        "--trace",
+        type=str,
+        required=False,
+        default=None,
+        help="Record per-method RobotController call counts and latency, and write a Chrome trace-event JSON to this file",
+    )
+
+    parser.add_argument(
+        "--trace_allocations",
+        action="store_true",
+        help="Also record bytes allocated per RobotController call when tracing (slow)",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        required=False,
+        default=None,
+        help="Seed the game (bots' rc.get_random(), ids and replay ID) so that runs are reproducible",
+    )
+
+    parser.add_argument(
+        "--adjudicate",
+        action="store_true",
+        help="End decided games early (asset ratio, idle bots, unthreatened castle lead; see src/adjudicator.py)",
+    )
+
+    parser.add_argument(
+        "--compact_replay",
+        action="store_true",
+        help="Fold runs of idle turns (no state change by either bot) into one replay entry each",
+    )
+
+    parser.add_argument(
+        "--action_log",
+        type=str,
+        required=False,
+        default=None,
+        help="Also write the bots' state changing calls to this file, to re-simulate the game with verify_replay.py",
+    )
+
     args = parser.parse_args()
 
     render = args.render
@@ -59,7 +102,10 @@ def main():
         map_path = args.map_path
 
     game = Game(
-        blue_path=blue_path, red_path=red_path, map_path=map_path, output_path=args.output_file, render=render
+        blue_path=blue_path, red_path=red_path, map_path=map_path, output_path=args.output_file, render=render,
+        trace_path=args.trace, trace_allocations=args.trace_allocations, seed=args.seed,
+        adjudication=AdjudicationRules() if args.adjudicate else None, compact_replay=args.compact_replay,
+        action_log_path=args.action_log
     )
     print("Game Start")
 
@@ -0,0 +1,295 @@
+''' action-log replays: the RobotController calls that changed the game, and a re-simulator that replays them without bot code '''
+
+import inspect
+import json
+import time
+from enum import Enum
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.game_constants import Team, UnitType, BuildingType, Direction
+from src.game_state import GameState
+from src.map import Map
+from src.map_processor import string_to_tile
+from src.replay import ReplayStream, expand_entry
+from src.robot_controller import RobotController
+from src.state_listener import MutationCounter
+
+# RobotController methods that can change the game state
+RECORDED_METHODS = RobotController.BATCH_ACTIONS | {"submit_actions"}
+
+# enums that can appear in the arguments of recorded calls, written as "<enum>.<member>"
+ARG_ENUMS = {enum.__name__: enum for enum in (UnitType, BuildingType, Direction, Team)}
+
+
+def encode_arg(arg: Any) -> Any:
+    if isinstance(arg, Enum):
+        return f'{type(arg).__name__}.{arg.name}'
+    if isinstance(arg, (list, tuple)):
+        return [encode_arg(item) for item in arg]
+    return arg
+
+
+def decode_arg(arg: Any) -> Any:
+    if isinstance(arg, str) and '.' in arg:
+        enum_name, member = arg.split('.', 1)
+        if enum_name in ARG_ENUMS:
+            return ARG_ENUMS[enum_name][member]
+    if isinstance(arg, list):
+        return [decode_arg(item) for item in arg]
+    return arg
+
+
+def map_to_dict(map: Map) -> Dict:
+    '''The map with its main castle locations, enough to start a game from'''
+    return {**map.to_dict(), "blue_castle_loc": list(map.blue_castle_loc), "red_castle_loc": list(map.red_castle_loc)}
+
+
+def map_from_dict(map_data: Dict) -> Map:
+    tiles = [[string_to_tile(name) for name in column] for column in map_data["tiles"]]
+    return Map(map_data["width"], map_data["height"], tiles, tuple(map_data["blue_castle_loc"]), tuple(map_data["red_castle_loc"]))
+
+
+
+class ActionRecorder:
+    '''
+    Records the RobotController calls of both bots that changed the game state, in the order they were made
+
+    A call is kept if it succeeded or if the game state was mutated during it (a few actions fail after
+    a partial change, ie explore_for_health with a bad target), so failed no-op calls don't bloat the log.
+    Each action is [turn, team name, method, *arguments], with enum arguments written as "<enum>.<member>".
+    '''
+
+    def __init__(self, game_state: GameState):
+        self.game_state = game_state
+        self.map = map_to_dict(game_state.map) #the map before any bridge is built
+
+        self.actions: List[List] = []
+        self.lock = Lock() # player code runs in its own thread
+
+        self.mutations = MutationCounter()
+        game_state.add_listener(self.mutations)
+
+
+    def wrap(self, controller: RobotController) -> 'RecordingRobotController':
+        '''Returns a controller that behaves like the given one, but records its mutating calls'''
+        return RecordingRobotController(controller, self)
+
+
+    def to_dict(self, replay_id: str, winner: Optional[str], end_reason: Optional[str]) -> Dict:
+        return {
+            "ID": replay_id,
+            "map": self.map,
+            "turns": self.game_state.turn,
+            "winner_color": winner,
+            "end_reason": end_reason,
+            "actions": self.actions,
+        }
+
+
+    def export(self, filename: str, replay_id: str, winner: Optional[str], end_reason: Optional[str]):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(replay_id, winner, end_reason), f, separators=(',', ':'))
+
+
+
+class RecordingRobotController:
+    '''
+    Stands in for a RobotController and forwards every attribute to it, recording the mutating calls.
+    Calls made internally by the controller (ie submit_actions forwarding to sell_unit) are not recorded again.
+    '''
+
+    def __init__(self, controller: RobotController, recorder: ActionRecorder):
+        self._controller = controller
+        self._recorder = recorder
+        self._team = controller.get_ally_team()
+        self._wrapped: Dict[str, Callable] = {}
+
+
+    def __getattr__(self, name: str):
+        #only called for attributes not found on the wrapper itself
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+
+        attr = getattr(self._controller, name)
+        if name not in RECORDED_METHODS:
+            return attr
+
+        wrapped = self._record(name, attr)
+        self._wrapped[name] = wrapped
+        return wrapped
+
+
+    def _record(self, name: str, method: Callable) -> Callable:
+        recorder = self._recorder
+        team = self._team.name
+        game_state = recorder.game_state
+
+        signature = inspect.signature(method)
+
+        def recorded(*args, **kwargs):
+            if kwargs:
+                args = signature.bind(*args, **kwargs).args #logged positionally
+
+            mutations = recorder.mutations.mutations
+            res = method(*args)
+
+            changed = any(res) if isinstance(res, list) else bool(res)
+            if changed or recorder.mutations.mutations != mutations:
+                with recorder.lock:
+                    recorder.actions.append([game_state.turn, team, name, *(encode_arg(arg) for arg in args)])
+
+            return res
+
+        recorded.__name__ = name
+        recorded.__doc__ = method.__doc__
+        return recorded
+
+
+
+'''
+-------------
+Re-simulation
+-------------
+'''
+
+def load_action_log(filename: str) -> Dict:
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def resimulate(action_log: Dict, on_turn: Optional[Callable[[GameState], bool]] = None) -> GameState:
+    '''
+    Rebuilds a game from its map and action log, without running bot code: every turn is started as in
+    Game.run_turn and the recorded calls are applied in order through each team's RobotController.
+    on_turn, if given, is called with the game state after every turn and stops the re-simulation by returning False.
+    Returns the final game state
+    '''
+
+    game_state = GameState(map_from_dict(action_log["map"]))
+    controllers = {team: RobotController(team, game_state) for team in Team}
+
+    actions = action_log["actions"]
+    i = 0
+
+    for turn in range(1, action_log["turns"] + 1):
+        game_state.start_turn()
+
+        while i < len(actions) and actions[i][0] == turn:
+            _, team, name, *args = actions[i]
+            getattr(controllers[Team[team]], name)(*(decode_arg(arg) for arg in args))
+            i += 1
+
+        if on_turn is not None and not on_turn(game_state):
+            break
+
+    return game_state
+
+
+def replay_snapshots(replay_file: str) -> Iterator[Tuple[Dict, bool]]:
+    '''(game state, folded) for every turn of a replay, streamed; folded is True for the turns of idle runs'''
+    with ReplayStream(replay_file) as stream:
+        for _, entry in stream.entries():
+            for step in expand_entry(entry):
+                if "game_state" in step:
+                    yield step["game_state"], step.get("folded", False)
+
+
+
+class ReplayVerifier:
+    '''
+    Compares a re-simulation with the snapshots of the game's replay, turn by turn (except each team's time
+    remaining, which is wall-clock), as the on_turn callback of resimulate
+
+    GameState.to_dict is called on the same turns as in the live game (the turns the replay recorded, and once
+    more at the end) since it has a side effect: once a team has lost all its buildings, it sets the health of
+    the buildings it exported last to 0. Snapshots are therefore compared one recorded turn late, when no later
+    export can change them. Turns folded into idle runs are compared with the entry they were folded into, with
+    the turn and balances of the re-simulation, and must not change the game state.
+    '''
+
+    def __init__(self, replay_file: str):
+        self.snapshots = replay_snapshots(replay_file)
+        self.pending = next(self.snapshots, None)
+
+        self.mutations = MutationCounter()
+        self.attached = False
+
+        #(snapshot, exported state, overrides for folded turns) waiting for the next export
+        self.deferred: List[Tuple[Dict, Dict, Optional[Dict]]] = []
+        self.base: Optional[Dict] = None #state exported on the last recorded turn
+        self.base_mutations = 0
+
+        self.checked = 0
+        self.mismatch: Optional[str] = None
+
+
+    def on_turn(self, game_state: GameState) -> bool:
+        if not self.attached:
+            game_state.add_listener(self.mutations)
+            self.attached = True
+
+        while self.pending is not None and self.pending[0]["turn"] == game_state.turn:
+            snapshot, folded = self.pending
+            self.pending = next(self.snapshots, None)
+
+            if not folded:
+                state = game_state.to_dict()
+                if not self.flush():
+                    return False
+                self.base, self.base_mutations = state, self.mutations.mutations
+                self.deferred.append((snapshot, state, None))
+
+            elif self.mutations.mutations != self.base_mutations:
+                self.mismatch = f'turn {game_state.turn}: the state changed on a turn the replay folded into an idle run'
+                return False
+
+            else:
+                overrides = {"turn": game_state.turn, "balance": {team.name: balance for team, balance in game_state.balance.items()}}
+                self.deferred.append((snapshot, self.base, overrides))
+
+        return True
+
+
+    def finish(self, game_state: GameState) -> bool:
+        '''The final export of the game (see Game.calculate_winner), then the last comparisons'''
+        game_state.to_dict()
+        return self.flush()
+
+
+    def flush(self) -> bool:
+        for snapshot, state, overrides in self.deferred:
+            expected = state if overrides is None else {**state, **overrides}
+
+            keys = [key for key in snapshot if key != "time_remaining" and snapshot[key] != expected.get(key)]
+            if keys:
+                self.mismatch = f'turn {snapshot["turn"]}: {", ".join(keys)} differ'
+                return False
+
+            self.checked += 1
+
+        self.deferred = []
+        return True
+
+
+def verify(action_log: Dict, replay_file: str) -> Tuple[bool, str]:
+    '''
+    Re-simulates an action log and compares every turn with the snapshots of the game's replay (see ReplayVerifier)
+    Stops at the first mismatch. Returns (True if every snapshot matched, a description of the result)
+    '''
+
+    verifier = ReplayVerifier(replay_file)
+
+    start = time.perf_counter()
+    game_state = resimulate(action_log, verifier.on_turn)
+    if verifier.mismatch is None:
+        verifier.finish(game_state)
+    elapsed = time.perf_counter() - start
+
+    if verifier.mismatch is not None:
+        return False, f'Mismatch at {verifier.mismatch} (after {verifier.checked} matching snapshots)'
+    if verifier.pending is not None:
+        return False, f'Re-simulation ended at turn {game_state.turn}, before the replay snapshot of turn {verifier.pending[0]["turn"]}'
+
+    return True, f'{verifier.checked} snapshots matched over {game_state.turn} turns, re-simulated in {elapsed:.2f}s'
@@ -0,0 +1,165 @@
+''' early termination of games that are already decided, evaluated once per turn by Game '''
+
+from typing import Optional, Tuple
+
+from src.game_constants import Team
+from src.game_state import GameState
+from src.state_listener import MutationCounter
+
+
+class AdjudicationRules:
+    '''
+    Thresholds for ending a game early; setting a rule's turns to None disables it
+
+      - asset ratio: one team has no units and its net worth (balance + asset value) has been at most
+        1/asset_ratio of the other team's for asset_ratio_turns turns in a row. The other team wins.
+      - idle: neither bot has changed the game state (no spawns, builds, moves, attacks, ...) for idle_turns
+        turns in a row. Nothing will change before the turn limit except income, so the game is
+        decided as if it had been played out.
+      - castle lead: one team's main castle has had at least castle_lead more health than the other's,
+        with no enemy unit within castle_threat_range of it, for castle_lead_turns turns in a row.
+        That team wins, as it would at the turn limit if nothing changes.
+    '''
+
+    def __init__(self, asset_ratio: float = 10.0, asset_ratio_turns: Optional[int] = 50,
+                 idle_turns: Optional[int] = 200,
+                 castle_lead: int = 10, castle_threat_range: int = 8, castle_lead_turns: Optional[int] = 300):
+        self.asset_ratio = asset_ratio
+        self.asset_ratio_turns = asset_ratio_turns
+        self.idle_turns = idle_turns
+        self.castle_lead = castle_lead
+        self.castle_threat_range = castle_threat_range
+        self.castle_lead_turns = castle_lead_turns
+
+
+
+class Adjudicator(MutationCounter):
+    '''
+    Follows a game state and decides, after each turn, whether the game can be ended early
+
+    Each rule keeps a streak of consecutive turns it has held for, so a check costs a few comparisons
+    (the castle lead rule also scans the trailing team's units, and only while the lead holds).
+    State changes are counted as a MutationCounter listening to the game state.
+    '''
+
+    def __init__(self, game_state: GameState, rules: Optional[AdjudicationRules] = None):
+        super().__init__()
+
+        self.game_state = game_state
+        self.rules = rules if rules is not None else AdjudicationRules()
+
+        #(team that would win, streak length)
+        self.asset_streak: Tuple[Optional[Team], int] = (None, 0)
+        self.castle_streak: Tuple[Optional[Team], int] = (None, 0)
+
+        self.last_checked_mutations = 0
+        self.idle_streak = 0
+
+        game_state.add_listener(self)
+
+
+    def detach(self):
+        self.game_state.remove_listener(self)
+
+
+    def check(self, turn_limit: int) -> Optional[Tuple[Team, str]]:
+        '''
+        Called at the end of every turn with the game's current turn limit
+        Returns (winner, reason) if the game should end now, None otherwise
+        '''
+
+        rules = self.rules
+
+        #idle: no mutations since the last check
+        idle = self.mutations == self.last_checked_mutations
+        self.last_checked_mutations = self.mutations
+        self.idle_streak = self.idle_streak + 1 if idle else 0
+
+        if rules.idle_turns is not None and self.idle_streak >= rules.idle_turns:
+            return self.projected_winner(turn_limit), f'idle: no state changes for {self.idle_streak} turns'
+
+        if rules.asset_ratio_turns is not None:
+            self.asset_streak = self.extend(self.asset_streak, self.asset_ratio_leader())
+            team, streak = self.asset_streak
+            if streak >= rules.asset_ratio_turns:
+                return team, f'asset ratio: {self.game_state.get_opposite_team(team).name} had no units and at most 1/{rules.asset_ratio} of the net worth for {streak} turns'
+
+        if rules.castle_lead_turns is not None:
+            self.castle_streak = self.extend(self.castle_streak, self.castle_lead_leader())
+            team, streak = self.castle_streak
+            if streak >= rules.castle_lead_turns:
+                return team, f'castle lead: main castle ahead by at least {rules.castle_lead} health and unthreatened for {streak} turns'
+
+        return None
+
+
+    @staticmethod
+    def extend(streak: Tuple[Optional[Team], int], leader: Optional[Team]) -> Tuple[Optional[Team], int]:
+        '''Extends a streak if the same team leads again, restarts it otherwise'''
+        if leader is None:
+            return (None, 0)
+        return (leader, streak[1] + 1 if streak[0] == leader else 1)
+
+
+    '''
+    -----
+    Rules
+    -----
+    '''
+
+    def asset_ratio_leader(self) -> Optional[Team]:
+        '''The team whose opponent has no units and a net worth deficit of at least asset_ratio, if any'''
+
+        game_state = self.game_state
+
+        for team in Team:
+            enemy = game_state.get_opposite_team(team)
+            if game_state.units[enemy]:
+                continue
+
+            if game_state.get_net_worth(team) >= self.rules.asset_ratio * max(game_state.get_net_worth(enemy), 1):
+                return team
+
+        return None
+
+
+    def castle_lead_leader(self) -> Optional[Team]:
+        '''The team whose main castle leads by castle_lead health with no enemy unit in threat range, if any'''
+
+        game_state = self.game_state
+
+        blue_health = game_state.get_castle_health(Team.BLUE)
+        red_health = game_state.get_castle_health(Team.RED)
+
+        if abs(blue_health - red_health) < self.rules.castle_lead:
+            return None
+
+        team = Team.BLUE if blue_health > red_health else Team.RED
+        castle = game_state.get_building_from_id(game_state.main_castle_ids[team])
+
+        for unit in game_state.units[game_state.get_opposite_team(team)].values():
+            if max(abs(unit.x - castle.x), abs(unit.y - castle.y)) <= self.rules.castle_threat_range:
+                return None
+
+        return team
+
+
+    def projected_winner(self, turn_limit: int) -> Team:
+        '''
+        The winner at the turn limit if nothing but income changes until then: main castles stay as they are,
+        and net worth grows by the (same) passive income plus each team's farm income every turn
+        '''
+
+        game_state = self.game_state
+
+        blue_health = game_state.get_castle_health(Team.BLUE)
+        red_health = game_state.get_castle_health(Team.RED)
+
+        if blue_health != red_health:
+            return game_state.get_winner()
+
+        turns_left = max(turn_limit - game_state.turn, 0)
+        projected = {team: game_state.get_net_worth(team) + turns_left * game_state.farm_income[team] for team in Team}
+
+        # Red wins ties, as in GameState.get_winner
+        return Team.BLUE if projected[Team.BLUE] > projected[Team.RED] else Team.RED
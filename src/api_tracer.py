@@ -0,0 +1,224 @@
+''' optional tracing wrapper around the robot controller; records how often and how expensively bots call each API method '''
+
+import json
+import time
+import tracemalloc
+from threading import Lock
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.game_constants import Team
+from src.robot_controller import RobotController
+
+
+class ApiTracer:
+    '''
+    Collects per (team, turn, method) statistics for RobotController calls made by bots.
+
+    For every call the tracer records the call count, the cumulative wall time and,
+    if track_allocations is set, the peak number of bytes allocated by the call (via tracemalloc).
+    Calls made internally by the controller (ie unit_possible_move_directions calling
+    can_move_unit_in_direction) are not counted; only the calls the bot makes are.
+
+    NOTE: allocation tracking slows the game down considerably, only use it when profiling
+    '''
+
+    def __init__(self, track_allocations: bool = False, record_events: bool = True):
+        self.track_allocations = track_allocations
+        self.record_events = record_events # keep every call for the chrome trace
+
+        # (team name, turn, method) -> [calls, seconds, allocated bytes]
+        self.stats: Dict[Tuple[str, int, str], List[float]] = {}
+        # raw (team name, turn, method, start, duration, allocated bytes) events
+        self.events: List[Tuple[str, int, str, float, float, int]] = []
+
+        self.start_time = time.perf_counter()
+        self.lock = Lock() # player code runs in its own thread
+
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+    def wrap(self, controller: RobotController) -> 'TracedRobotController':
+        '''Returns a controller that behaves like the given one, but traces every call'''
+        return TracedRobotController(controller, self)
+
+
+    def record(self, team: Team, turn: int, method: str, start: float, duration: float, allocated: int):
+        '''Records a single traced call'''
+
+        key = (team.name, turn, method)
+
+        with self.lock:
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = [0, 0.0, 0]
+                self.stats[key] = entry
+
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] += allocated
+
+            if self.record_events:
+                self.events.append((team.name, turn, method, start - self.start_time, duration, allocated))
+
+
+    '''
+    ---------
+    Reporting
+    ---------
+    '''
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        '''
+        Aggregates the per turn statistics over the whole game
+
+        Returns {team name: {method: {"calls", "total_time", "mean_time", "allocated_bytes"}}}
+        '''
+
+        res: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+        for (team, _, method), (calls, seconds, allocated) in self.stats.items():
+            entry = res.setdefault(team, {}).setdefault(method, {"calls": 0, "total_time": 0.0, "allocated_bytes": 0})
+            entry["calls"] += calls
+            entry["total_time"] += seconds
+            entry["allocated_bytes"] += allocated
+
+        for methods in res.values():
+            for entry in methods.values():
+                entry["mean_time"] = entry["total_time"] / entry["calls"]
+
+        return res
+
+
+    def per_turn(self, team: Team) -> Dict[int, Dict[str, List[float]]]:
+        '''Returns {turn: {method: [calls, seconds, allocated bytes]}} for a team'''
+
+        res: Dict[int, Dict[str, List[float]]] = {}
+
+        for (team_name, turn, method), entry in self.stats.items():
+            if team_name == team.name:
+                res.setdefault(turn, {})[method] = list(entry)
+
+        return res
+
+
+    def print_summary(self, top: int = 10):
+        '''Prints the most expensive methods per team, sorted by cumulative time'''
+
+        for team, methods in sorted(self.summary().items()):
+            print(f'{team} API usage:')
+            ranked = sorted(methods.items(), key=lambda item: item[1]["total_time"], reverse=True)
+
+            for method, entry in ranked[:top]:
+                line = f'  {method:<36} calls: {entry["calls"]:>9}  total: {entry["total_time"]:9.4f}s  mean: {entry["mean_time"] * 1e6:9.2f}us'
+                if self.track_allocations:
+                    line += f'  alloc: {entry["allocated_bytes"] / 1024:10.1f}KiB'
+                print(line)
+
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        '''
+        Converts the recorded calls into the Chrome trace event format (chrome://tracing, Perfetto)
+
+        Each team is a thread; every call is a complete ("X") event. If events were not recorded,
+        one event per (turn, method) is emitted instead, laid out back to back.
+        '''
+
+        trace_events: List[Dict[str, Any]] = []
+
+        for team in Team:
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": team.value, "args": {"name": team.name}})
+
+        if self.record_events:
+            for team, turn, method, start, duration, allocated in self.events:
+                trace_events.append({
+                    "name": method,
+                    "cat": "api",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": Team[team].value,
+                    "ts": start * 1e6,
+                    "dur": duration * 1e6,
+                    "args": {"turn": turn, "allocated_bytes": allocated},
+                })
+        else:
+            offsets = {team.name: 0.0 for team in Team}
+            for (team, turn, method), (calls, seconds, allocated) in sorted(self.stats.items(), key=lambda item: (item[0][1], item[0][0])):
+                trace_events.append({
+                    "name": method,
+                    "cat": "api",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": Team[team].value,
+                    "ts": offsets[team] * 1e6,
+                    "dur": seconds * 1e6,
+                    "args": {"turn": turn, "calls": calls, "allocated_bytes": allocated},
+                })
+                offsets[team] += seconds
+
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+    def export_chrome_trace(self, filename: str):
+        '''Writes the chrome trace event JSON to a file'''
+        with open(filename, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+
+class TracedRobotController:
+    '''
+    Stands in for a RobotController and forwards every method call to it, timing each one.
+    Non-callable attributes are returned untouched.
+    '''
+
+    def __init__(self, controller: RobotController, tracer: ApiTracer):
+        self._controller = controller
+        self._tracer = tracer
+        self._team = controller.get_ally_team()
+        self._wrapped: Dict[str, Callable] = {}
+
+
+    def __getattr__(self, name: str):
+        #only called for attributes not found on the wrapper itself
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+
+        attr = getattr(self._controller, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+
+        wrapped = self._trace(name, attr)
+        self._wrapped[name] = wrapped
+        return wrapped
+
+
+    def _trace(self, name: str, method: Callable) -> Callable:
+        '''Wraps a bound controller method with timing (and allocation) measurement'''
+
+        tracer = self._tracer
+        team = self._team
+        controller = self._controller
+
+        def traced(*args, **kwargs):
+            allocated = 0
+
+            if tracer.track_allocations:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+
+                if tracer.track_allocations:
+                    allocated = max(0, tracemalloc.get_traced_memory()[1] - before)
+
+                tracer.record(team, controller.get_turn(), name, start, duration, allocated)
+
+        traced.__name__ = name
+        traced.__doc__ = method.__doc__
+        return traced
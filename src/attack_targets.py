@@ -0,0 +1,76 @@
+''' attack candidates of units (the enemies within their attack range), cached for the turn and kept valid through game state mutations '''
+
+from typing import Dict, List, Tuple
+
+from src.buildings import Building
+from src.game_constants import UnitType
+from src.game_state import GameState
+from src.state_listener import GameStateListener
+from src.units import Unit
+
+# units never change attack range, so no unit reaches further than this
+MAX_ATTACK_RANGE = max(unit_type.attack_range for unit_type in UnitType)
+
+
+class AttackTargets(GameStateListener):
+    '''
+    (enemy unit ids, enemy building ids) within the attack range of each unit, computed on first request
+    through the game state's tile grids and cached until the turn ends or something changes in range
+
+    A unit's entry is dropped when it moves or is removed, and when an enemy is placed, moves or is
+    removed within MAX_ATTACK_RANGE of it; health and action changes do not affect what is in range.
+    Either team's units can be looked up.
+    '''
+
+    def __init__(self, game_state: GameState):
+        self.game_state = game_state
+        self.targets: Dict[int, Tuple[List[int], List[int]]] = {}
+
+
+    def get(self, unit: Unit) -> Tuple[List[int], List[int]]:
+        '''Ids of the enemy units and buildings within range of a unit, each in id order (the cached lists, do not modify)'''
+
+        targets = self.targets.get(unit.id)
+        if targets is None:
+            game_state = self.game_state
+            enemy = game_state.get_opposite_team(unit.team)
+            targets = (
+                [target.id for target in game_state.units_within(enemy, unit.x, unit.y, unit.attack_range)],
+                [target.id for target in game_state.buildings_within(enemy, unit.x, unit.y, unit.attack_range)],
+            )
+            self.targets[unit.id] = targets
+
+        return targets
+
+
+    def changed_at(self, obj, x: int, y: int):
+        '''Drops the entries of the units that may have (x, y) in range, if obj's team is their enemy'''
+
+        if not self.targets:
+            return
+
+        attacker_team = self.game_state.get_opposite_team(obj.team)
+        for attacker in self.game_state.units_within(attacker_team, x, y, MAX_ATTACK_RANGE):
+            self.targets.pop(attacker.id, None)
+
+
+    def unit_added(self, unit: Unit):
+        self.changed_at(unit, unit.x, unit.y)
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        self.targets.pop(unit.id, None)
+        self.changed_at(unit, old_x, old_y)
+        self.changed_at(unit, unit.x, unit.y)
+
+    def unit_removed(self, unit: Unit):
+        self.targets.pop(unit.id, None)
+        self.changed_at(unit, unit.x, unit.y)
+
+    def building_added(self, building: Building):
+        self.changed_at(building, building.x, building.y)
+
+    def building_removed(self, building: Building):
+        self.changed_at(building, building.x, building.y)
+
+    def turn_started(self, turn: int):
+        self.targets.clear()
@@ -1,5 +1,8 @@
 ''' creates building objects (castle, farms, etc) '''
+from typing import Optional
+
 from src.game_constants import GameConstants, BuildingType, Team, BuildingRender
+from src.turn_clock import TurnClock
 
 class Building:
     '''
@@ -9,10 +12,15 @@ class Building:
 
     #ID for participants to interface through instead of through the actual object for safety
     id_counter = 0
+
+    #no per instance __dict__: large bases are cheaper to hold, copy and serialize
+    __slots__ = ('id', 'team', 'type', 'x', 'y', 'health', 'damage', 'defense', 'attack_range', 'damage_range',
+                 '_turn_actions_remaining', 'turn_stamp', 'clock', 'level', 'spawnable')
     
-    def __init__(self, team: Team, type: BuildingType, x: int, y: int, level: int = 1, spawnable: bool= False):
+    def __init__(self, team: Team, type: BuildingType, x: int, y: int, level: int = 1, spawnable: bool= False, id: Optional[int] = None, clock: Optional[TurnClock] = None):
 
-        self.id = self.increment()
+        #the game state hands out ids per game so that they are reproducible; fall back on the global counter
+        self.id = self.increment() if id is None else id
 
         self.team = team
         self.type = type
@@ -27,13 +35,48 @@ class Building:
         self.damage_range = type.damage_range
 
         #cannot move and cannot act the turn of its spawn
-        self.turn_actions_remaining = 0
+        #with a clock (given by the game state), resets to the type's per turn value once the turn changes
+        self.clock = clock
+        self.turn_stamp = None if clock is None else clock.turn
+        self._turn_actions_remaining = 0
 
         self.level = level
 
         self.spawnable = type.spawnable
 
-        self.placeable_tiles = type.placeable_tiles #tiles that the building can be placed on
+    @property
+    def placeable_tiles(self):
+        #tiles that the building can be placed on; shared by every building of a type
+        return self.type.placeable_tiles
+
+    def refresh_turn(self):
+        '''Resets actions remaining if the clock has moved on since it was last written'''
+        if self.clock is not None and self.turn_stamp != self.clock.turn:
+            self.turn_stamp = self.clock.turn
+            self._turn_actions_remaining = self.type.actions_per_turn
+
+    @property
+    def turn_actions_remaining(self) -> int:
+        self.refresh_turn()
+        return self._turn_actions_remaining
+
+    @turn_actions_remaining.setter
+    def turn_actions_remaining(self, value: int):
+        self.refresh_turn()
+        self._turn_actions_remaining = value
+
+    def __copy__(self) -> 'Building':
+        self.refresh_turn()
+        clone = self.__class__.__new__(self.__class__)
+        for name in Building.__slots__:
+            setattr(clone, name, getattr(self, name))
+        #a copy is a snapshot: its counters do not reset with the game's turns
+        clone.clock = None
+        return clone
+
+    def __deepcopy__(self, memo) -> 'Building':
+        #every field but the clock (dropped by __copy__) is an int, a bool or an enum member, so a shallow copy is already a deep copy
+        return self.__copy__()
 
 
     @staticmethod
@@ -0,0 +1,268 @@
+'''
+Step-based (gym-style) environments around GameState and RobotController, for training learned policies
+
+Unlike Game, these drive the engine directly from the caller's thread: no threads, no time pool,
+no replay recording. One agent controls one team; the other team is played by a bot file (or does nothing).
+'''
+
+import copy
+import random
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.game import import_file
+from src.game_constants import Team
+from src.game_state import GameState
+from src.map import Map
+from src.map_processor import process_map
+from src.player import Player
+from src.robot_controller import RobotController
+
+
+# an action is a (RobotController method name, *args) tuple, ie ("move_unit_in_direction", unit_id, Direction.UP)
+# see RobotController.submit_actions
+Action = Tuple[Any, ...]
+
+# either a list of actions, or a function that is called with the agent's controller and issues them itself
+Actions = Union[Sequence[Action], Callable[[RobotController], Any], None]
+
+# (observation, reward, done, info)
+StepResult = Tuple[Any, float, bool, Dict[str, Any]]
+
+
+def default_observation(game_state: GameState, controller: RobotController) -> RobotController:
+    '''The default observation is the agent's own robot controller, which is free to produce'''
+    return controller
+
+
+def default_reward(game_state: GameState, team: Team, done: bool, winner: Optional[Team]) -> float:
+    '''+1 for a win, -1 for a loss, 0 otherwise'''
+    if not done or winner is None:
+        return 0.0
+
+    return 1.0 if winner == team else -1.0
+
+
+
+class GameEnv:
+    '''
+    A single game, stepped one turn at a time
+
+    env = GameEnv(team=Team.BLUE, opponent_path="bots/attack_bot_v1.py")
+    obs = env.reset("maps/simple_map.awap25m", seed=0)
+    while True:
+        obs, reward, done, info = env.step([("spawn_unit", UnitType.KNIGHT, castle_id)])
+        if done: break
+
+    Each step plays one full turn: the agent's actions are applied when it is the agent's move,
+    and the opponent bot is called (in this thread, untimed) on its move. Observations are taken
+    when it is the agent's move.
+    '''
+
+    def __init__(self, team: Team = Team.BLUE, opponent_path: Optional[str] = None, turn_limit: int = 3000,
+                 observation_fn: Callable[[GameState, RobotController], Any] = default_observation,
+                 reward_fn: Callable[[GameState, Team, bool, Optional[Team]], float] = default_reward):
+
+        self.team = team
+        self.enemy_team = Team.RED if team == Team.BLUE else Team.BLUE
+        self.turn_limit = turn_limit
+
+        self.observation_fn = observation_fn
+        self.reward_fn = reward_fn
+
+        #the bot module is loaded once; a fresh BotPlayer is made on every reset
+        self.opponent_module = None
+        if opponent_path is not None:
+            self.opponent_module = import_file(f"env_opponent_{id(self)}", opponent_path)
+
+        self.game_state: Optional[GameState] = None
+        self.controllers: Dict[Team, RobotController] = {}
+        self.opponent: Optional[Player] = None
+
+        self.map_source: Union[str, Map, None] = None
+        self.seed: Optional[int] = None
+        self.done = True
+        self.winner: Optional[Team] = None
+
+
+    def reset(self, map_source: Union[str, Map, None] = None, seed: Optional[int] = None) -> Any:
+        '''
+        Starts a new game on a map (a .awap25m path or a Map; defaults to the previous one)
+        Returns the first observation
+        '''
+
+        if map_source is None:
+            map_source = self.map_source
+
+        if map_source is None:
+            raise ValueError('reset() needs a map the first time it is called')
+
+        self.map_source = map_source
+        self.seed = seed
+
+        game_map = process_map(map_source) if isinstance(map_source, str) else copy.deepcopy(map_source)
+        self.game_state = GameState(game_map)
+
+        #same derivation as Game, so a seeded env and a seeded game hand bots the same generators
+        rng = random.Random(seed)
+        self.controllers = {
+            Team.BLUE: RobotController(Team.BLUE, self.game_state, random.Random(rng.getrandbits(64))),
+            Team.RED: RobotController(Team.RED, self.game_state, random.Random(rng.getrandbits(64))),
+        }
+
+        self.opponent = None
+        if self.opponent_module is not None:
+            self.opponent = self.opponent_module.BotPlayer(copy.deepcopy(game_map))
+
+        self.done = False
+        self.winner = None
+
+        self.begin_turn()
+        return self.observe()
+
+
+    def step(self, actions: Actions) -> StepResult:
+        '''
+        Applies the agent's actions for this turn, lets the opponent play, and advances to the agent's next move
+
+        Returns (observation, reward, done, info); info["results"] holds the result of each action
+        '''
+
+        if self.done:
+            raise RuntimeError('step() called on a finished game; call reset()')
+
+        results = self.apply_actions(actions)
+
+        #blue moves first, so after a blue agent the red opponent still has to play this turn
+        if self.team == Team.BLUE:
+            self.play_opponent()
+
+        if not self.check_done():
+            self.begin_turn()
+
+        reward = self.reward_fn(self.game_state, self.team, self.done, self.winner)
+        info = {"turn": self.game_state.turn, "results": results, "winner": self.winner}
+
+        return self.observe(), reward, self.done, info
+
+
+    '''
+    ----------------
+    Turn progression
+    ----------------
+    '''
+
+    def begin_turn(self):
+        '''Starts the next turn; if the agent is red, the blue opponent plays first'''
+
+        self.game_state.start_turn()
+
+        if self.team == Team.RED:
+            self.play_opponent()
+            #the turn limit is checked after the agent's step, so a red agent still plays the last turn
+            self.check_done(check_turn_limit=False)
+
+
+    def play_opponent(self):
+        '''
+        Runs the opponent bot for the current turn, unless it is asleep (rc.sleep_until).
+        Like in Game, exceptions in bot code are printed and ignored
+        '''
+
+        if self.opponent is None or self.controllers[self.enemy_team].is_sleeping():
+            return
+
+        try:
+            self.opponent.play_turn(self.controllers[self.enemy_team])
+        except Exception:
+            traceback.print_exc()
+
+
+    def check_done(self, check_turn_limit: bool = True) -> bool:
+        '''Ends the game if a castle is destroyed or (if check_turn_limit) the turn limit is reached'''
+
+        if self.done:
+            return True
+
+        castle_destroyed = self.game_state.is_castle_destroyed(Team.BLUE) or self.game_state.is_castle_destroyed(Team.RED)
+
+        if castle_destroyed or (check_turn_limit and self.game_state.turn >= self.turn_limit):
+            self.done = True
+            self.winner = self.game_state.get_winner()
+
+        return self.done
+
+
+    def apply_actions(self, actions: Actions) -> List[Any]:
+        '''Applies the agent's actions through its robot controller, returning each action's result'''
+
+        controller = self.controllers[self.team]
+
+        if actions is None or self.done:
+            return []
+
+        if callable(actions):
+            return [actions(controller)]
+
+        return controller.submit_actions(actions)
+
+
+    def observe(self) -> Any:
+        return self.observation_fn(self.game_state, self.controllers[self.team])
+
+
+
+class VectorGameEnv:
+    '''
+    K independent GameEnvs stepped in lockstep within one process
+
+    step() takes one actions entry per game and returns lists of observations, rewards, dones and infos.
+    With auto_reset, a finished game is immediately reset on the same map with its seed incremented;
+    its last observation is then in info["final_observation"].
+    '''
+
+    def __init__(self, num_envs: int, auto_reset: bool = True, **env_kwargs):
+        self.envs = [GameEnv(**env_kwargs) for _ in range(num_envs)]
+        self.auto_reset = auto_reset
+
+
+    def __len__(self) -> int:
+        return len(self.envs)
+
+
+    def reset(self, map_sources: Union[str, Map, Sequence[Union[str, Map]]], seeds: Union[int, Sequence[Optional[int]], None] = None) -> List[Any]:
+        '''
+        Resets every game. map_sources is one map for all games or one per game;
+        seeds is a base seed (game i gets seed + i), one seed per game, or None
+        '''
+
+        if isinstance(map_sources, (str, Map)):
+            map_sources = [map_sources] * len(self.envs)
+
+        if seeds is None or isinstance(seeds, int):
+            seeds = [None if seeds is None else seeds + i for i in range(len(self.envs))]
+
+        return [env.reset(map_source, seed) for env, map_source, seed in zip(self.envs, map_sources, seeds)]
+
+
+    def step(self, actions: Sequence[Actions]) -> Tuple[List[Any], List[float], List[bool], List[Dict[str, Any]]]:
+        '''Steps every game by one turn with its own actions'''
+
+        if len(actions) != len(self.envs):
+            raise ValueError(f'expected {len(self.envs)} actions entries, got {len(actions)}')
+
+        observations, rewards, dones, infos = [], [], [], []
+
+        for env, env_actions in zip(self.envs, actions):
+            obs, reward, done, info = env.step(env_actions)
+
+            if done and self.auto_reset:
+                info["final_observation"] = obs
+                obs = env.reset(env.map_source, None if env.seed is None else env.seed + len(self.envs))
+
+            observations.append(obs)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+
+        return observations, rewards, dones, infos
@@ -0,0 +1,174 @@
+''' events that bots can subscribe to through the robot controller instead of rescanning the game state every turn '''
+
+from enum import Enum
+from typing import Dict, List, Optional
+
+from src.buildings import Building
+from src.game_constants import Team, Tile
+from src.game_state import GameState
+from src.state_listener import GameStateListener
+from src.units import Unit
+
+
+class EventType(Enum):
+    ENEMY_IN_RADIUS = 0 # an enemy unit was spawned in, or moved into, a watched area
+    UNIT_KILLED = 1 # a unit died (not sold or disbanded)
+    BUILDING_DAMAGED = 2 # a building lost health and survived
+    BUILDING_DESTROYED = 3 # a building was destroyed (not sold)
+    BRIDGE_BUILT = 4 # a tile was turned into a bridge
+
+
+
+class Event:
+    '''
+    A fired event. Fields that do not apply to the event type are None:
+      - unit_id, building_id: the unit/building the event is about
+      - team: that unit's/building's team
+      - x, y: where it happened
+      - health: remaining health (BUILDING_DAMAGED)
+    '''
+
+    __slots__ = ('type', 'subscription_id', 'turn', 'team', 'unit_id', 'building_id', 'x', 'y', 'health')
+
+    def __init__(self, type: EventType, subscription_id: int, turn: int, team: Optional[Team] = None,
+                 unit_id: Optional[int] = None, building_id: Optional[int] = None,
+                 x: Optional[int] = None, y: Optional[int] = None, health: Optional[int] = None):
+        self.type = type
+        self.subscription_id = subscription_id
+        self.turn = turn
+        self.team = team
+        self.unit_id = unit_id
+        self.building_id = building_id
+        self.x = x
+        self.y = y
+        self.health = health
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)}' for name in self.__slots__[2:] if getattr(self, name) is not None)
+        return f'Event({self.type.name}, {fields})'
+
+
+
+class Subscription:
+    '''What a subscription watches: an event type, optionally restricted to a team, or an area for ENEMY_IN_RADIUS'''
+
+    def __init__(self, id: int, type: EventType, team: Optional[Team] = None, x: int = 0, y: int = 0, radius: int = 0):
+        self.id = id
+        self.type = type
+        self.team = team
+        self.x = x
+        self.y = y
+        self.radius = radius
+
+    def in_area(self, x: int, y: int) -> bool:
+        return max(abs(x - self.x), abs(y - self.y)) <= self.radius
+
+
+
+class EventWatch(GameStateListener):
+    '''
+    One team's subscriptions, checked at the game state's mutation points; fired events queue up until read
+
+    Every mutation only checks the subscriptions of its event type, so a turn costs
+    O(mutations x matching subscriptions) no matter how large the armies are.
+    '''
+
+    def __init__(self, game_state: GameState, team: Team):
+        self.game_state = game_state
+        self.team = team
+        self.enemy = game_state.get_opposite_team(team)
+
+        self.next_id = 0
+        self.subscriptions: Dict[EventType, Dict[int, Subscription]] = {event_type: {} for event_type in EventType}
+        self.events: List[Event] = []
+
+        #last known health of every building, to tell damage apart from other building updates
+        self.building_health: Dict[int, int] = {building.id: building.health for building in game_state.building_index.values()}
+
+
+    def subscribe(self, type: EventType, team: Optional[Team] = None, x: int = 0, y: int = 0, radius: int = 0) -> int:
+        subscription = Subscription(self.next_id, type, team, x, y, radius)
+        self.next_id += 1
+        self.subscriptions[type][subscription.id] = subscription
+        return subscription.id
+
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        for subscriptions in self.subscriptions.values():
+            if subscriptions.pop(subscription_id, None) is not None:
+                return True
+        return False
+
+
+    def pop_events(self) -> List[Event]:
+        events = self.events
+        self.events = []
+        return events
+
+
+    def fire(self, subscription: Subscription, **fields):
+        self.events.append(Event(subscription.type, subscription.id, self.game_state.turn, **fields))
+
+
+    def matching(self, type: EventType, team: Team):
+        '''Subscriptions of a type that are not restricted to another team'''
+        for subscription in self.subscriptions[type].values():
+            if subscription.team is None or subscription.team == team:
+                yield subscription
+
+
+    '''
+    ----------------------------------
+    GameStateListener (mutation points)
+    ----------------------------------
+    '''
+
+    def unit_added(self, unit: Unit):
+        if unit.team != self.enemy:
+            return
+
+        for subscription in self.subscriptions[EventType.ENEMY_IN_RADIUS].values():
+            if subscription.in_area(unit.x, unit.y):
+                self.fire(subscription, team=unit.team, unit_id=unit.id, x=unit.x, y=unit.y)
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        if unit.team != self.enemy:
+            return
+
+        for subscription in self.subscriptions[EventType.ENEMY_IN_RADIUS].values():
+            if subscription.in_area(unit.x, unit.y) and not subscription.in_area(old_x, old_y):
+                self.fire(subscription, team=unit.team, unit_id=unit.id, x=unit.x, y=unit.y)
+
+    def unit_removed(self, unit: Unit):
+        if unit.health > 0: #sold or disbanded
+            return
+
+        for subscription in self.matching(EventType.UNIT_KILLED, unit.team):
+            self.fire(subscription, team=unit.team, unit_id=unit.id, x=unit.x, y=unit.y)
+
+    def building_added(self, building: Building):
+        self.building_health[building.id] = building.health
+
+    def building_updated(self, building: Building):
+        damaged = building.health < self.building_health.get(building.id, building.health)
+        self.building_health[building.id] = building.health
+
+        if damaged:
+            for subscription in self.matching(EventType.BUILDING_DAMAGED, building.team):
+                self.fire(subscription, team=building.team, building_id=building.id, x=building.x, y=building.y, health=building.health)
+
+    def building_removed(self, building: Building):
+        self.building_health.pop(building.id, None)
+
+        if building.health > 0: #sold
+            return
+
+        for subscription in self.matching(EventType.BUILDING_DESTROYED, building.team):
+            self.fire(subscription, team=building.team, building_id=building.id, x=building.x, y=building.y)
+
+    def tile_changed(self, x: int, y: int):
+        if self.game_state.map.tiles[x][y] != Tile.BRIDGE:
+            return
+
+        for subscription in self.subscriptions[EventType.BRIDGE_BUILT].values():
+            self.fire(subscription, x=x, y=y)
@@ -3,6 +3,7 @@ import traceback
 from typing import Optional
 
 import importlib.util
+import random
 import uuid
 
 import sys
@@ -17,6 +18,10 @@ from src.game_state import GameState
 from src.game_constants import Team, GameConstants
 from src.robot_controller import RobotController
 from src.player import Player
+from src.api_tracer import ApiTracer
+from src.action_log import ActionRecorder
+from src.adjudicator import Adjudicator, AdjudicationRules
+from src.state_listener import MutationCounter
 
 from src.map_processor import process_map
 
@@ -36,8 +41,14 @@ def import_file(module_name, file_path):
 
 
 class Game:
-    def __init__(self, blue_path: str, red_path: str, map_path: str, output_path: str, render= False):
+    def __init__(self, blue_path: str, red_path: str, map_path: str, output_path: str, render= False, trace_path: Optional[str]= None, trace_allocations: bool= False, seed: Optional[int]= None, adjudication: Optional[AdjudicationRules]= None, compact_replay: bool= False, action_log_path: Optional[str]= None):
         
+        #with a seed, bots' random generators, ids and the replay ID are reproducible
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if seed is not None:
+            random.seed(seed) #for bots that still use the random module directly
+
         self.map = process_map(map_path)
         self.game_state = GameState(map=self.map)
 
@@ -75,35 +86,113 @@ class Game:
 
 
         #initialize controller
-        self.blue_controller = RobotController(Team.BLUE, self.game_state)
-        self.red_controller = RobotController(Team.RED, self.game_state)
+        self.blue_controller = RobotController(Team.BLUE, self.game_state, random.Random(self.rng.getrandbits(64)))
+        self.red_controller = RobotController(Team.RED, self.game_state, random.Random(self.rng.getrandbits(64)))
+        self.team_controllers = {Team.BLUE: self.blue_controller, Team.RED: self.red_controller} #never traced
+
+        #optionally record the bots' state changing calls, to re-simulate the game without them (see src/action_log.py)
+        self.action_log_path = action_log_path
+        self.action_recorder: Optional[ActionRecorder] = None
+        if action_log_path is not None:
+            os.makedirs(os.path.dirname(action_log_path) or '.', exist_ok=True)
+            self.action_recorder = ActionRecorder(self.game_state)
+            self.blue_controller = self.action_recorder.wrap(self.blue_controller)
+            self.red_controller = self.action_recorder.wrap(self.red_controller)
+
+        #optionally trace the bots' API calls (counts, time, allocations)
+        self.trace_path = trace_path
+        self.tracer: Optional[ApiTracer] = None
+        if trace_path is not None:
+            os.makedirs(os.path.dirname(trace_path) or '.', exist_ok=True)
+            self.tracer = ApiTracer(track_allocations=trace_allocations)
+            self.blue_controller = self.tracer.wrap(self.blue_controller)
+            self.red_controller = self.tracer.wrap(self.red_controller)
+
         self.replay = []  # To store turn-by-turn replay information
+
+        #idle turns (no state change by either bot) are folded into the entry before them with compact_replay
+        #(see src/replay.py to expand them again)
+        self.compact_replay = compact_replay
+        self.activity = MutationCounter()
+        self.game_state.add_listener(self.activity)
+        self.last_mutations = 0
+        self.folded_turns = 0
         self.map = self.game_state.map.to_dict()
 
         self.turn_limit = 3000
         self.winner = None 
+        self.end_reason: Optional[str] = None #why the game ended, recorded in the replay
+
+        #optionally end decided games early (see src/adjudicator.py)
+        self.adjudicator: Optional[Adjudicator] = None
+        if adjudication is not None:
+            self.adjudicator = Adjudicator(self.game_state, adjudication)
 
     def record_turn(self, turn_data: Dict):
         """Record data of the current turn into the replay."""
         # print(f'turn_data: {turn_data['game_state']['buildings']}')
         self.replay.append(turn_data)
 
+    def next_turn_number(self) -> int:
+        '''Turn number of the next replay entry, counting the turns folded into idle entries'''
+        return len(self.replay) + self.folded_turns + 1
+
+    def record_idle_turn(self) -> bool:
+        '''
+        With compact_replay, folds an idle turn into the last replay entry if that entry was idle too
+        Returns True if folded; otherwise the turn is recorded in full and marked as the start of an idle run
+        '''
+        last = self.replay[-1] if self.replay else None
+        if last is None or "idle_turns" not in last:
+            return False
+
+        last["idle_turns"] += 1
+        self.folded_turns += 1
+        return True
+
     def export_replay(self, filename: str):
-        self.replay.pop()
+        #drop the last turn (only the last turn of an idle run)
+        if self.replay and self.replay[-1].get("idle_turns", 0) > 0:
+            self.replay[-1]["idle_turns"] -= 1
+            self.folded_turns -= 1
+        else:
+            self.replay.pop()
         """Export the replay object to a JSON file with the winner at the top level."""
+        replay_id = self.replay_id()
         replay_data = {
-            "ID": str(uuid.uuid4()),
+            "ID": replay_id,
             "map": self.map,
             "map-changes": {
                 "changed-turns": self.game_state.changed_turns,
                 "changed-maps": self.game_state.changed_maps
             },
             "winner_color": self.winner, 
+            "end_reason": self.end_reason,
             "replay": self.replay
         }
         with open(filename, 'w') as f:
             json.dump(replay_data, f, indent=4)
 
+        if self.action_recorder is not None:
+            self.action_recorder.export(self.action_log_path, replay_id, self.winner, self.end_reason)
+
+        self.export_trace()
+
+    def replay_id(self) -> str:
+        '''Random replay ID, derived from the seed if the game is seeded'''
+        if self.seed is None:
+            return str(uuid.uuid4())
+
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def export_trace(self):
+        '''Writes the API trace (if tracing) as chrome trace event JSON and prints a summary'''
+        if self.tracer is None:
+            return
+
+        self.tracer.export_chrome_trace(self.trace_path)
+        self.tracer.print_summary()
+
 
     def call_player_code(self, team: Team):
         '''Calls the player code of a given team'''
@@ -111,6 +200,10 @@ class Game:
         player: Player = self.blue_player if team == Team.BLUE else self.red_player
         controller = self.blue_controller if team == Team.BLUE else self.red_controller
 
+        # bots that called rc.sleep_until are not called (and spend no time) until they wake up
+        if self.team_controllers[team].is_sleeping():
+            return True
+
         # Create a thread that runs player.play_turn.
         # This function might not exist if the player code is broken, so we need to handle that.
         try:
@@ -135,74 +228,21 @@ class Game:
             
     
     def calculate_winner(self) -> Team:
-        '''Win and tie breaking mechanics'''
-
-        blue_lose = self.game_state.blue_main_castle_id not in self.game_state.buildings[Team.BLUE]  # blue castle destroyed
-        red_lose = self.game_state.red_main_castle_id not in self.game_state.buildings[Team.RED]  # red castle destroyed
+        '''Win and tie breaking mechanics (see GameState.get_winner); records the last turn for the replay'''
 
         # record last turn for replay file (health of one should be 0)
         turn_data = {
-            "turn_number": len(self.replay)+1, 
+            "turn_number": self.next_turn_number(), 
             "game_state": self.game_state.to_dict(),  
         }
 
         self.record_turn(turn_data)
 
+        winner = self.game_state.get_winner()
 
-        # check if one main castle is destroyed while the other is not (definitive win)
-        if blue_lose and not red_lose:
-            print('RED WINS')
-            self.winner = "RED"
-            
-            return Team.RED  # Red main castle still standing
-        elif red_lose and not blue_lose:
-            print('BLUE WINS')
-            self.winner = "BLUE"
-            return Team.BLUE  # Blue main castle still standing
-
-        # turn limit reached case:
-        # check if one main castle has more health than the other when they are both not destroyed
-        if not blue_lose and not red_lose:
-            blue_castle_health = self.game_state.buildings[Team.BLUE][self.game_state.blue_main_castle_id].health
-            red_castle_health = self.game_state.buildings[Team.RED][self.game_state.red_main_castle_id].health
-
-            if blue_castle_health != red_castle_health:
-                # winner by castle health
-                winner = Team.BLUE if blue_castle_health > red_castle_health else Team.RED
-                winner_color = "BLUE" if winner == Team.BLUE else "RED"
-                print(f'{winner_color} WINS')
-                self.winner  = winner_color
-                return winner
-
-        # breaks tie by highest (total balance + tower cost + unit cost)
-        total_balance = {
-            Team.BLUE: self.game_state.balance[Team.BLUE],
-            Team.RED: self.game_state.balance[Team.RED]
-        }
-
-        for team in Team:
-            # add unit costs
-            for unit in self.game_state.units[team].values():
-                total_balance[team] += unit.type.cost
-            # add building costs
-            for building in self.game_state.buildings[team].values():
-                total_balance[team] += building.type.cost
-
-        if total_balance[Team.BLUE] > total_balance[Team.RED]:
-            print('BLUE WINS')
-            self.winner  = "BLUE"
-            return Team.BLUE  # highest balance wins
-        elif total_balance[Team.BLUE] < total_balance[Team.RED]:
-            print('RED WINS')
-            self.winner  = "RED"
-            return Team.RED  # highest balance wins
-
-        # Red arbitrarily wins because Red always moves second
-        print('RED WINS')
-        self.winner  = "RED"
-        return Team.RED
-
-
+        print(f'{winner.name} WINS')
+        self.winner = winner.name
+        return winner
 
 
 
@@ -223,15 +263,18 @@ class Game:
         red_success = self.call_player_code(Team.RED)
 
         if not blue_success and not red_success:  # Both failed
+            self.end_reason = 'both bots failed'
             return self.calculate_winner()
         
         if not blue_success: # Blue failed
             print('RED WINS')
             self.winner = "RED"
+            self.end_reason = 'blue bot failed'
             return Team.RED
         if not red_success: # Red failed
             print('BLUE WINS')
             self.winner = "BLUE"
+            self.end_reason = 'red bot failed'
             return Team.BLUE
         
         
@@ -240,18 +283,55 @@ class Game:
             self.game_state.blue_main_castle_id not in self.game_state.buildings[Team.BLUE] 
             or self.game_state.red_main_castle_id not in self.game_state.buildings[Team.RED]
             ):
+            self.end_reason = 'castle destroyed'
             return self.calculate_winner()
         
 
+        idle = self.activity.mutations == self.last_mutations
+        self.last_mutations = self.activity.mutations
+
+        if self.compact_replay and idle and self.record_idle_turn():
+            return None
+
         turn_data = {
-            "turn_number": len(self.replay) + 1, # Removed + 1 because the map now takes up one spot
+            "turn_number": self.next_turn_number(), # Removed + 1 because the map now takes up one spot
             "game_state": self.game_state.to_dict(),  
         }
 
+        if self.compact_replay and idle:
+            # the following idle_turns turns repeat this state, but for the turn number and each team's income
+            turn_data["idle_turns"] = 0
+            turn_data["income"] = {team.name: GameConstants.PASSIVE_COINS_PER_TURN + self.game_state.farm_income[team] for team in Team}
+
         self.record_turn(turn_data)
 
         return None
 
+
+    def adjudicate(self) -> Optional[Team]:
+        '''Ends the game if the adjudication rules find it decided, recording the reason; returns the winner'''
+
+        verdict = self.adjudicator.check(self.turn_limit) #the limit can be changed after the game is made (ie benchmarks)
+        if verdict is None:
+            return None
+
+        winner, reason = verdict
+        self.end_reason = f'adjudicated on turn {self.game_state.turn}: {reason}'
+        print(self.end_reason)
+
+        # record last turn for replay file, like calculate_winner
+        turn_data = {
+            "turn_number": self.next_turn_number(), 
+            "game_state": self.game_state.to_dict(),  
+        }
+
+        self.record_turn(turn_data)
+
+        print(f'{winner.name} WINS')
+        self.winner = winner.name
+        return winner
+
+
     def run_game(self) -> Optional[Team]:
         '''Initializes the bots and runs the game. Exports the JSON when finished'''
 
@@ -264,6 +344,7 @@ class Game:
             print("RED WINS")
             self.replay.append({})
             self.winner = "RED"
+            self.end_reason = 'blue bot failed to initialize'
             self.export_replay(self.output_path)
             return Team.RED
         elif self.red_failed_init:
@@ -271,6 +352,7 @@ class Game:
             print("BLUE WINS")
             self.replay.append({})
             self.winner = "BLUE"
+            self.end_reason = 'red bot failed to initialize'
             self.export_replay(self.output_path)
             return Team.BLUE
 
@@ -282,6 +364,9 @@ class Game:
 
             winner = self.run_turn()
 
+            if winner is None and self.adjudicator is not None:
+                winner = self.adjudicate()
+
             if winner is not None:
                 self.export_replay(self.output_path) 
 
@@ -291,6 +376,9 @@ class Game:
                 return winner
             
 
+        self.end_reason = 'turn limit'
+        #the replay is written before calculate_winner records the final state (which it leaves out), so the winner is set here
+        self.winner = self.game_state.get_winner().name
         self.export_replay(self.output_path)
 
         if self.render:
@@ -1,9 +1,10 @@
 ''' file that contains the game state at a given instnace; can change the game state through functions (attack function, spawn function) '''
 
 from src.map import Map
-from src.game_constants import Team, GameConstants, UnitType, BuildingType, MapRender
+from src.game_constants import Team, GameConstants, UnitType, BuildingType
 from src.buildings import Building
 from src.units import Unit
+from src.turn_clock import TurnClock
 
 from src.exceptions import GameException
 
@@ -14,7 +15,7 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide" #stop the command line pygame
 import pygame
 import pygame.font as font
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 
 class GameState:
@@ -35,6 +36,7 @@ class GameState:
         self.balance = {Team.BLUE: GameConstants.STARTING_BALANCE, Team.RED: GameConstants.STARTING_BALANCE}
 
         self.turn = 0
+        self.clock = TurnClock(self.turn) #shared with every unit and building, which reset their per turn counters from it
 
         self.has_rendered = False #if the pygame has been initialized
         self.tile_size = -1
@@ -42,9 +44,21 @@ class GameState:
         self.buildings: Dict[Team, Dict[int, Building]] = {Team.BLUE: {}, Team.RED: {}}
         self.units: Dict[Team, Dict[int, Unit]] = {Team.BLUE: {}, Team.RED: {}}
 
+        #id -> object over both teams (the object knows its team), so id lookups are a single dict access
+        self.unit_index: Dict[int, Unit] = {}
+        self.building_index: Dict[int, Building] = {}
+
+        #ids are counted per game (not per process) so that runs are reproducible
+        self.next_unit_id = 0
+        self.next_building_id = 0
+
+        #running per team aggregates, kept up to date as units and buildings are added and removed
+        self.farm_income = {Team.BLUE: 0, Team.RED: 0} #coins per turn from farms
+        self.asset_value = {Team.BLUE: 0, Team.RED: 0} #total cost of all units and buildings
+
         #get main castle to buildings; add players' main castle given by map into buildings
-        red_main_castle = Building(Team.RED, BuildingType.MAIN_CASTLE, self.map.red_castle_loc[0], self.map.red_castle_loc[1], spawnable= True)
-        blue_main_castle = Building(Team.BLUE, BuildingType.MAIN_CASTLE, self.map.blue_castle_loc[0], self.map.blue_castle_loc[1], spawnable= True)
+        red_main_castle = Building(Team.RED, BuildingType.MAIN_CASTLE, self.map.red_castle_loc[0], self.map.red_castle_loc[1], spawnable= True, id= self.new_building_id(), clock= self.clock)
+        blue_main_castle = Building(Team.BLUE, BuildingType.MAIN_CASTLE, self.map.blue_castle_loc[0], self.map.blue_castle_loc[1], spawnable= True, id= self.new_building_id(), clock= self.clock)
         #this is to know when we deleted the building (ie when the game ends)
 
         self.building_placeable_map = [[True for y in range(self.map.height)] for x in range(self.map.width)]
@@ -53,6 +67,12 @@ class GameState:
         self.building_placeable_map[self.map.red_castle_loc[0]][self.map.red_castle_loc[1]] = False
         self.building_placeable_map[self.map.blue_castle_loc[0]][self.map.blue_castle_loc[1]] = False
 
+        #the unit/building on every tile (at most one of each), so area lookups only visit the tiles in range
+        self.unit_grid: List[List[Optional[Unit]]] = [[None for y in range(self.map.height)] for x in range(self.map.width)]
+        self.building_grid: List[List[Optional[Building]]] = [[None for y in range(self.map.height)] for x in range(self.map.width)]
+        self.building_grid[red_main_castle.x][red_main_castle.y] = red_main_castle
+        self.building_grid[blue_main_castle.x][blue_main_castle.y] = blue_main_castle
+
 
         self.main_castle_ids: Dict[Team, int] = {Team.RED: red_main_castle.id, Team.BLUE: blue_main_castle.id}
 
@@ -62,6 +82,10 @@ class GameState:
         #add to buildings
         self.buildings[Team.BLUE][blue_main_castle.id] = blue_main_castle
         self.buildings[Team.RED][red_main_castle.id] = red_main_castle
+        self.building_index[blue_main_castle.id] = blue_main_castle
+        self.building_index[red_main_castle.id] = red_main_castle
+        self.asset_value[Team.BLUE] += blue_main_castle.type.cost
+        self.asset_value[Team.RED] += red_main_castle.type.cost
 
 
         self.time_remaining = {Team.BLUE: GameConstants.INITIAL_TIME_POOL, Team.RED: GameConstants.INITIAL_TIME_POOL}
@@ -78,6 +102,9 @@ class GameState:
         self.changed_turns = [] # turn numbers where map was changed
         self.changed_maps = [] # changed map on that turn, list of 2D maps
 
+        self.listeners: List = [] # GameStateListeners notified of every mutation (see src/state_listener.py)
+        self.threat_map = None # ThreatMap shared by both teams, created on the first RobotController.get_threat_map (see src/threat_map.py)
+
     
     '''
     -----------------------
@@ -87,62 +114,64 @@ class GameState:
 
     def get_opposite_team(self, team: Team) -> Team:
         return Team.RED if team == Team.BLUE else Team.BLUE
+
+    def add_listener(self, listener):
+        '''Registers a GameStateListener to be notified of every mutation'''
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def notify(self, event: str, *args):
+        '''Calls the given GameStateListener method on every listener'''
+        for listener in self.listeners:
+            getattr(listener, event)(*args)
+
+    def new_unit_id(self) -> int:
+        '''Hands out the next unit id of this game'''
+        res = self.next_unit_id
+        self.next_unit_id += 1
+        return res
+
+    def new_building_id(self) -> int:
+        '''Hands out the next building id of this game'''
+        res = self.next_building_id
+        self.next_building_id += 1
+        return res
     
 
     def get_team_of_unit(self, unit_id: int) -> Optional[Team]:
         '''
         Gets the team that a unit belongs to
-        Returns either Team.RED or Team.BLUE if unit_id is valid; raises error if not valid
+        Returns either Team.RED or Team.BLUE if unit_id is valid; None if not valid
         '''
-        #check validity and get unit's team
-        if unit_id in self.units[Team.RED]:
-            return Team.RED
-        elif unit_id in self.units[Team.BLUE]:
-            return Team.BLUE
-        else:
-            return None
+        unit = self.unit_index.get(unit_id)
+        return None if unit is None else unit.team
 
     
     def get_team_of_building(self, building_id: int) -> Optional[Team]:
         '''
-        Gets the team that a unit belongs to
-        Returns either Team.RED or Team.BLUE if unit_id is valid; raises error if not valid
+        Gets the team that a building belongs to
+        Returns either Team.RED or Team.BLUE if building_id is valid; None if not valid
         '''
-
-        #check validity and get unit's team
-        if building_id in self.buildings[Team.RED]:
-            return Team.RED
-        elif building_id in self.buildings[Team.BLUE]:
-            return Team.BLUE
-        else:
-            return None
+        building = self.building_index.get(building_id)
+        return None if building is None else building.team
 
 
 
     def get_unit_from_id(self, unit_id: int) -> Optional[Unit]:
         '''
-        Gets the actual unit object from its id
+        Gets the actual unit object from its id (None if not valid)
         '''
-        team = self.get_team_of_unit(unit_id)
-
-        if team is None:
-            return None
-
-        return self.units[team][unit_id]
+        return self.unit_index.get(unit_id)
 
 
 
     def get_building_from_id(self, building_id: int) -> Optional[Building]:
         '''
-        Gets the actual building object from its id
+        Gets the actual building object from its id (None if not valid)
         '''
-        team = self.get_team_of_building(building_id)
-
-        # basic validity
-        if team is None:
-            return None
-
-        return self.buildings[team][building_id]
+        return self.building_index.get(building_id)
 
 
     '''
@@ -195,10 +224,15 @@ class GameState:
             print('unit failed to place')
             return False
         
-        new_unit = Unit(team, unit_type, x, y, level)
+        new_unit = Unit(team, unit_type, x, y, level, id= self.new_unit_id(), clock= self.clock)
 
         self.units[team][new_unit.id] = new_unit
+        self.unit_index[new_unit.id] = new_unit
+        self.asset_value[team] += unit_type.cost
         self.unit_placeable_map[x][y] = False
+        self.unit_grid[x][y] = new_unit
+
+        self.notify('unit_added', new_unit)
         return True
 
 
@@ -226,10 +260,17 @@ class GameState:
             print('building failed to place')
             return False
         
-        new_building = Building(team, building_type, x, y, level)
+        new_building = Building(team, building_type, x, y, level, id= self.new_building_id(), clock= self.clock)
 
         self.buildings[team][new_building.id] = new_building
+        self.building_index[new_building.id] = new_building
+        self.asset_value[team] += building_type.cost
+        if building_type in self.FARMS:
+            self.farm_income[team] += building_type.coins_per_turn
         self.building_placeable_map[x][y] = False
+        self.building_grid[x][y] = new_building
+
+        self.notify('building_added', new_building)
         return True
 
 
@@ -239,6 +280,43 @@ class GameState:
     -------------------------
     '''
 
+    def units_within(self, team: Team, x: int, y: int, radius: int) -> List[Unit]:
+        '''
+        Units of a team within Chebyshev distance radius of (x, y), in id order
+        Visits only the tiles in range, or every unit of the team if there are fewer of them
+        '''
+
+        units = self.units[team]
+
+        if (2 * radius + 1) ** 2 > len(units):
+            return [unit for unit in units.values() if max(abs(unit.x - x), abs(unit.y - y)) <= radius]
+
+        found = []
+        for column in self.unit_grid[max(x - radius, 0) : x + radius + 1]:
+            for unit in column[max(y - radius, 0) : y + radius + 1]:
+                if unit is not None and unit.team == team:
+                    found.append(unit)
+
+        found.sort(key=lambda unit: unit.id)
+        return found
+
+    def buildings_within(self, team: Team, x: int, y: int, radius: int) -> List[Building]:
+        '''Buildings of a team within Chebyshev distance radius of (x, y), in id order (see units_within)'''
+
+        buildings = self.buildings[team]
+
+        if (2 * radius + 1) ** 2 > len(buildings):
+            return [building for building in buildings.values() if max(abs(building.x - x), abs(building.y - y)) <= radius]
+
+        found = []
+        for column in self.building_grid[max(x - radius, 0) : x + radius + 1]:
+            for building in column[max(y - radius, 0) : y + radius + 1]:
+                if building is not None and building.team == team:
+                    found.append(building)
+
+        found.sort(key=lambda building: building.id)
+        return found
+
     def move_unit(self, unit_id: int, dest_x: int, dest_y: int) -> bool:
         '''
         Moves a unit to dest_x and dest_y if possible given map constraints (ie in bounds)
@@ -250,23 +328,25 @@ class GameState:
         if not self.map.in_bounds(dest_x, dest_y):
             return False
         
-        #check validity and get unit's team
-        team = self.get_team_of_unit(unit_id)
+        unit = self.unit_index.get(unit_id)
 
         #basic validity
-        if team is None:
+        if unit is None:
             return False
 
-        unit = self.units[team][unit_id]
-
         #change placeable map configurations
         self.unit_placeable_map[unit.x][unit.y] = True #can now place unit in old location
         self.unit_placeable_map[dest_x][dest_y] = False #can't place unit in new location
+        self.unit_grid[unit.x][unit.y] = None
+        self.unit_grid[dest_x][dest_y] = unit
 
         #change unit state
+        old_x, old_y = unit.x, unit.y
         unit.x = dest_x
         unit.y = dest_y
 
+        self.notify('unit_moved', unit, old_x, old_y)
+
 
     '''
     ----------------------------------------------------------
@@ -280,21 +360,34 @@ class GameState:
         Removes unit from game procedurally
         Precondition of safety for team/unit_id
         '''
+        self.notify('unit_removed', self.units[team][unit_id])
+
         #can place another unit at that location
 
         self.unit_placeable_map[self.units[team][unit_id].x][self.units[team][unit_id].y] = True
+        self.unit_grid[self.units[team][unit_id].x][self.units[team][unit_id].y] = None
+        self.asset_value[team] -= self.units[team][unit_id].type.cost
         #delete from units list
         del self.units[team][unit_id]
+        del self.unit_index[unit_id]
 
     def delete_building(self, team: Team, building_id: int):
         '''
         Removes building from game procedurally
         Precondition of safety for team/building_id
         '''
+        self.notify('building_removed', self.buildings[team][building_id])
+
         #can place another building at that location
         self.building_placeable_map[self.buildings[team][building_id].x][self.buildings[team][building_id].y] = True #can now place
+        self.building_grid[self.buildings[team][building_id].x][self.buildings[team][building_id].y] = None
+        building_type = self.buildings[team][building_id].type
+        self.asset_value[team] -= building_type.cost
+        if building_type in self.FARMS:
+            self.farm_income[team] -= building_type.coins_per_turn
         #delete from buildings list
         del self.buildings[team][building_id]
+        del self.building_index[building_id]
         
 
 
@@ -306,21 +399,21 @@ class GameState:
         if dmg < 0:
             raise GameException('damage must be non-negative')
         
-        #check validity and get unit's team
-        team = self.get_team_of_unit(unit_id)
+        unit = self.unit_index.get(unit_id)
 
         # basic validity
-        if team is None:
+        if unit is None:
             return False
 
-        self.units[team][unit_id].health -= dmg
+        unit.health -= dmg
 
         #if unit is destroyed
-        if self.units[team][unit_id].health <= 0:
+        if unit.health <= 0:
             #remove unit from game
-            self.delete_unit(team, unit_id)
+            self.delete_unit(unit.team, unit_id)
             return True  # Unit was killed
 
+        self.notify('unit_updated', unit)
         return False  # Unit is still alive
 
 
@@ -332,20 +425,20 @@ class GameState:
         if dmg < 0:
             raise GameException('damage must be non-negative')
         
-        #check validity and get unit's team
-        team = self.get_team_of_building(building_id)
+        building = self.building_index.get(building_id)
 
-        if team is None: #no action is taken
+        if building is None: #no action is taken
             return False
 
-        self.buildings[team][building_id].health -= dmg
+        building.health -= dmg
 
         #if building is destroyed
-        if self.buildings[team][building_id].health <= 0:
+        if building.health <= 0:
             #remove from game
-            self.delete_building(team, building_id)
+            self.delete_building(building.team, building_id)
             return True
         
+        self.notify('building_updated', building)
         return False
             
 
@@ -408,16 +501,9 @@ class GameState:
 
         self.turn += 1
 
-        # reset all units' actions and movement remaining this turn
-        for team_units in self.units.values():
-            for curr_unit in team_units.values():
-                curr_unit.turn_actions_remaining = curr_unit.type.actions_per_turn
-                curr_unit.turn_movement_remaining = curr_unit.type.move_range
-
-        #reset all buildings' actions remaining this turn
-        for team_buildings in self.buildings.values():
-            for curr_building in team_buildings.values():
-                curr_building.turn_actions_remaining = curr_building.type.actions_per_turn
+        # reset all units' actions and movement and all buildings' actions remaining this turn
+        # (lazily: each unit/building resets itself the next time it is read, see src/turn_clock.py)
+        self.clock.turn = self.turn
 
 
         # add passive income to balance
@@ -426,11 +512,69 @@ class GameState:
 
         # add farm's income to balance
         for team in [Team.RED, Team.BLUE]:
-            for building in self.buildings[team].values():
-                if building.type in self.FARMS:
-                    self.balance[team] += building.type.coins_per_turn
+            self.balance[team] += self.farm_income[team]
+
+        self.notify('turn_started', self.turn)
+
+
+
+
+    '''
+    -----------------
+    Winning mechanics
+    -----------------
+    '''
+
+    def is_castle_destroyed(self, team: Team) -> bool:
+        '''True if the team's main castle has been destroyed'''
+        return self.main_castle_ids[team] not in self.buildings[team]
+
+
+    def get_castle_health(self, team: Team) -> int:
+        '''Health of the team's main castle, 0 once it is destroyed'''
+        castle = self.building_index.get(self.main_castle_ids[team])
+        return 0 if castle is None else castle.health
+
+
+    def get_net_worth(self, team: Team) -> int:
+        '''Balance plus the cost of every unit and building the team owns (the tie breaking score)'''
+        return self.balance[team] + self.asset_value[team]
 
 
+    def get_winner(self) -> Team:
+        '''
+        Win and tie breaking mechanics, in order:
+          - the team whose main castle still stands
+          - the team whose main castle has more health
+          - the team with the highest (balance + building costs + unit costs)
+          - red, because red always moves second
+        '''
+
+        blue_lose = self.is_castle_destroyed(Team.BLUE)
+        red_lose = self.is_castle_destroyed(Team.RED)
+
+        # check if one main castle is destroyed while the other is not (definitive win)
+        if blue_lose and not red_lose:
+            return Team.RED
+        elif red_lose and not blue_lose:
+            return Team.BLUE
+
+        # check if one main castle has more health than the other when they are both not destroyed
+        if not blue_lose and not red_lose:
+            blue_castle_health = self.get_castle_health(Team.BLUE)
+            red_castle_health = self.get_castle_health(Team.RED)
+
+            if blue_castle_health != red_castle_health:
+                return Team.BLUE if blue_castle_health > red_castle_health else Team.RED
+
+        # breaks tie by highest (total balance + tower cost + unit cost)
+        total_balance = {team: self.get_net_worth(team) for team in Team}
+
+        if total_balance[Team.BLUE] > total_balance[Team.RED]:
+            return Team.BLUE
+
+        # Red arbitrarily wins ties because Red always moves second
+        return Team.RED
 
 
     '''
@@ -445,39 +589,20 @@ class GameState:
         if not self.has_rendered:
             self.has_rendered = True
             self.renderer.init_render()
+            self.renderer.follow(list(self.unit_index.values()), list(self.building_index.values()))
+            self.add_listener(self.renderer) #tracks the cells that change between frames
         
         # For performance
         pygame.event.get()
 
-        self.renderer.map_render()
-
-        #render red buildings
-        for building in self.buildings[Team.RED].values():
-            self.renderer.building_render(building)
-            
-
-        #render blue buildings
-        for building in self.buildings[Team.BLUE].values():
-            self.renderer.building_render(building)
-
-        #render red units
-        for unit in self.units[Team.RED].values():
-            self.renderer.unit_render(unit)
-
-        #render blue units
-        for unit in self.units[Team.BLUE].values():
-            self.renderer.unit_render(unit)
+        #render the map, buildings and units (only the changed cells after the first frame)
+        rects = self.renderer.render_changes()
 
         #render game_state (turn, balance, etc.)
-        BLACK = (0, 0, 0)
-        turn_text = font.SysFont('Comic Sans MS', 10).render(f'Turn: {self.turn}', True, BLACK)
-        blue_balance_text = font.SysFont('Comic Sans MS', 10).render(f'Blue balance: {self.balance[Team.BLUE]}', True, BLACK)
-        red_balance_text = font.SysFont('Comic Sans MS', 10).render(f'Red balance: {self.balance[Team.RED]}', True, BLACK)
-        self.renderer.screen.blit(turn_text, ((5, self.renderer.height * MapRender.TILE_SIZE + 5), (20, 10)))
-        self.renderer.screen.blit(blue_balance_text, ((5, self.renderer.height * MapRender.TILE_SIZE + 20), (20, 10)))
-        self.renderer.screen.blit(red_balance_text, ((5, self.renderer.height * MapRender.TILE_SIZE + 35), (20, 10)))
+        rects.append(self.renderer.clear_status())
+        self.renderer.status_render(self.turn, self.balance[Team.BLUE], self.balance[Team.RED])
 
-        pygame.display.update()
+        pygame.display.update(rects)
 
     def save_previous_state(self, blueBuildings, redBuildings):
         '''Saves the previous state of buildings to prevent export of empty list into json'''
@@ -528,6 +653,9 @@ class GameState:
             "red_main_castle_id": self.red_main_castle_id,
             "blue_main_castle_id": self.blue_main_castle_id,
             "time_remaining": {team.name: time for team, time in self.time_remaining.items()},
+            "asset_value": {team.name: value for team, value in self.asset_value.items()},
+            "farm_income": {team.name: income for team, income in self.farm_income.items()},
+            "castle_health": {team.name: self.get_castle_health(team) for team in Team},
         }
 
 
@@ -0,0 +1,165 @@
+''' generates synthetic maps (.awap25m) and seeds game states with armies, for stress testing '''
+
+import json
+import random
+from typing import List, Optional, Tuple
+
+from src.game_constants import Team, Tile, UnitType
+from src.game_state import GameState
+
+
+CASTLE_PLACEMENTS = ['corners', 'mirrored', 'random']
+
+
+def generate_tiles(width: int, height: int, water: float = 0.1, mountain: float = 0.1, sand: float = 0.1, castle_placement: str = 'corners', seed: int = 0) -> List[List[str]]:
+    '''
+    Generates a width x height map in the .awap25m layout: tiles[x][y] are tile names,
+    with the castles given as 'BLUE CASTLE' and 'RED CASTLE'
+
+    water, mountain and sand are the fractions of the map covered by each tile type; the rest is grass.
+    Terrain is grown as random blobs so that water and mountains form obstacles rather than noise.
+
+    castle_placement is one of
+      - corners: blue in the bottom-left corner, red in the top-right corner
+      - mirrored: blue at a random location, red at its point reflection through the map center
+      - random: both at random locations
+    Castles and the tiles around them are always grass so that units can be spawned.
+    '''
+
+    if width < 2 or height < 2:
+        raise ValueError('map must be at least 2x2')
+
+    if min(water, mountain, sand) < 0 or water + mountain + sand > 1:
+        raise ValueError('tile ratios must be non-negative and sum to at most 1')
+
+    if castle_placement not in CASTLE_PLACEMENTS:
+        raise ValueError(f'castle_placement must be one of {CASTLE_PLACEMENTS}')
+
+    rng = random.Random(seed)
+    tiles = [[Tile.GRASS.name for y in range(height)] for x in range(width)]
+
+    for tile, ratio in [(Tile.WATER, water), (Tile.MOUNTAIN, mountain), (Tile.SAND, sand)]:
+        grow_blobs(tiles, tile.name, int(ratio * width * height), rng)
+
+    blue_loc, red_loc = castle_locations(width, height, castle_placement, rng)
+
+    #clear the castles' surroundings
+    for cx, cy in [blue_loc, red_loc]:
+        for x in range(max(0, cx - 1), min(width, cx + 2)):
+            for y in range(max(0, cy - 1), min(height, cy + 2)):
+                tiles[x][y] = Tile.GRASS.name
+
+    tiles[blue_loc[0]][blue_loc[1]] = 'BLUE CASTLE'
+    tiles[red_loc[0]][red_loc[1]] = 'RED CASTLE'
+
+    return tiles
+
+
+def grow_blobs(tiles: List[List[str]], tile_name: str, count: int, rng: random.Random, blob_size: int = 40):
+    '''Turns (about) count grass tiles into tile_name, grown as random blobs of about blob_size tiles'''
+
+    width, height = len(tiles), len(tiles[0])
+    placed = 0
+    attempts = 0
+
+    while placed < count and attempts < 10 * count + 10:
+        attempts += 1
+
+        start = (rng.randrange(width), rng.randrange(height))
+        if tiles[start[0]][start[1]] != Tile.GRASS.name:
+            continue
+
+        #randomized flood fill from the start tile
+        frontier = [start]
+        size = min(blob_size, count - placed)
+        grown = 0
+
+        while frontier and grown < size:
+            x, y = frontier.pop(rng.randrange(len(frontier)))
+            if tiles[x][y] != Tile.GRASS.name:
+                continue
+
+            tiles[x][y] = tile_name
+            grown += 1
+
+            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height and tiles[nx][ny] == Tile.GRASS.name:
+                    frontier.append((nx, ny))
+
+        placed += grown
+
+
+def castle_locations(width: int, height: int, castle_placement: str, rng: random.Random) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    '''Returns (blue castle location, red castle location)'''
+
+    if castle_placement == 'corners':
+        return (0, 0), (width - 1, height - 1)
+
+    while True:
+        blue = (rng.randrange(width), rng.randrange(height))
+
+        if castle_placement == 'mirrored':
+            red = (width - 1 - blue[0], height - 1 - blue[1])
+        else:
+            red = (rng.randrange(width), rng.randrange(height))
+
+        if blue != red:
+            return blue, red
+
+
+def write_map(tiles: List[List[str]], filename: str):
+    '''Writes tiles (as returned by generate_tiles) to a .awap25m file readable by process_map'''
+
+    with open(filename, 'w') as f:
+        f.write(json.dumps(tiles, separators=(',', ':')))
+
+
+def generate_map(filename: str, width: int, height: int, water: float = 0.1, mountain: float = 0.1, sand: float = 0.1, castle_placement: str = 'corners', seed: int = 0):
+    '''Generates a map and writes it to filename'''
+    write_map(generate_tiles(width, height, water, mountain, sand, castle_placement, seed), filename)
+
+
+
+'''
+---------------------
+Game state seeding
+---------------------
+'''
+
+def seed_units(game_state: GameState, units_per_team: int, unit_types: Optional[List[UnitType]] = None, seed: int = 0) -> int:
+    '''
+    Places up to units_per_team units per team at random free cells that they can walk on
+
+    Unit types are drawn uniformly from unit_types (default: knights only).
+    Returns the number of units placed per team, which is lower than requested if the map is full.
+    '''
+
+    if unit_types is None:
+        unit_types = [UnitType.KNIGHT]
+
+    rng = random.Random(seed)
+    game_map = game_state.map
+
+    cells = [(x, y) for x in range(game_map.width) for y in range(game_map.height) if game_state.unit_placeable_map[x][y]]
+    rng.shuffle(cells)
+
+    placed = {Team.BLUE: 0, Team.RED: 0}
+    team = Team.BLUE
+
+    for x, y in cells:
+        if placed[Team.BLUE] >= units_per_team and placed[Team.RED] >= units_per_team:
+            break
+
+        if placed[team] >= units_per_team:
+            team = game_state.get_opposite_team(team)
+
+        unit_type = rng.choice(unit_types)
+        if not game_state.is_unit_placeable(unit_type, x, y):
+            continue
+
+        game_state.place_unit(team, unit_type, x, y)
+        placed[team] += 1
+        team = game_state.get_opposite_team(team)
+
+    return min(placed.values())
@@ -5,13 +5,30 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide" #stop the command line pygame
 import pygame
 import pygame.font as font
 
+from typing import Dict, List, Optional, Set, Tuple
+
 from src.map import Map
 from src.game_constants import Team, MapRender, BuildingRender, UnitRender
 from src.buildings import Building
 from src.units import Unit
+from src.state_listener import GameStateListener
+
+Color = Tuple[int, int, int]
+
+
+class Renderer(GameStateListener):
+    '''
+    Contains helper functions that draws in pygame what is required
+
+    The map background (tiles and grid) is drawn once into a cached surface, and only the changed tile
+    is redrawn when a bridge is built (the renderer follows the game state as a listener once rendering starts).
+    Text is rendered through one font object, with surfaces cached per (text, color) for unit and building
+    labels and per (character, color) for the status text, which changes every turn.
 
-class Renderer:
-    '''Contains helper functions that draws in pygame what is required'''
+    After the first full frame, only the cells that changed since the last frame (units spawned, moved or
+    removed, buildings placed or removed, bridges) and the status area are redrawn and updated on the display,
+    so a frame costs O(changes) rather than O(map size).
+    '''
 
     def __init__(self, map: Map):
 
@@ -20,6 +37,17 @@ class Renderer:
         self.width = map.width
         self.height = map.height
 
+        self.background: Optional[pygame.Surface] = None
+        self.font: Optional[font.Font] = None
+        self.text_cache: Dict[Tuple[str, Color], pygame.Surface] = {}
+        self.glyph_cache: Dict[Tuple[str, Color], pygame.Surface] = {}
+
+        #what is drawn on each cell, and the cells to redraw in the next frame
+        self.units_at: Dict[Tuple[int, int], Unit] = {}
+        self.buildings_at: Dict[Tuple[int, int], Building] = {}
+        self.dirty: Set[Tuple[int, int]] = set()
+        self.full_redraw = True
+
 
     def get_screen_coords(self, x: int, y: int) -> tuple[tuple[int, int], tuple[int, int]]:
         '''
@@ -35,60 +63,245 @@ class Renderer:
         '''Initializes the pygame window'''
         pygame.init()
         pygame.display.set_caption("Game State Visualizer")
-        self.screen = pygame.display.set_mode((self.width * MapRender.TILE_SIZE, self.height * MapRender.TILE_SIZE + 50)) #+50 for the text at the bottom
+        self.screen = pygame.display.set_mode(self.screen_size())
+        self.font = font.SysFont('Comic Sans MS', 10)
 
-    def map_render(self):
-        '''Renders the map background'''
+
+    def init_headless(self):
+        '''Draws into an off-screen surface instead of a window (ie for exporting frames), no display needed'''
+        font.init()
+        self.screen = pygame.Surface(self.screen_size())
+        self.font = font.SysFont('Comic Sans MS', 10)
+
+
+    def screen_size(self) -> Tuple[int, int]:
+        return (self.width * MapRender.TILE_SIZE, self.height * MapRender.TILE_SIZE + 50) #+50 for the text at the bottom
+
+
+    def follow(self, units: List[Unit], buildings: List[Building]):
+        '''Starts tracking changes from the current units and buildings; the next frame is drawn in full'''
+
+        self.units_at = {(unit.x, unit.y): unit for unit in units}
+        self.buildings_at = {(building.x, building.y): building for building in buildings}
+        self.dirty.clear()
+        self.full_redraw = True
+
+
+    '''
+    ----------
+    Background
+    ----------
+    '''
+
+    def build_background(self):
+        '''Draws every tile and the grid into the cached background surface'''
+
+        self.background = pygame.Surface(self.screen.get_size())
 
         #all of the background is white
-        self.screen.fill((255, 255, 255))
+        self.background.fill((255, 255, 255))
 
         #draw tiles and map
         for x in range(self.width):
             for y in range(self.height):
 
                 color = self.map.get_tile_color(x, y)
-                pygame.draw.rect(self.screen, color, self.get_screen_coords(x, y))
+                pygame.draw.rect(self.background, color, self.get_screen_coords(x, y))
 
         #draw vertical lines for grid
         for x in range(self.map.width+1):
             bottom = (x*MapRender.TILE_SIZE, 0)
             top = (x*MapRender.TILE_SIZE, self.height*MapRender.TILE_SIZE)
 
-            pygame.draw.line(self.screen, MapRender.BORDER_COLOR, bottom, top)
+            pygame.draw.line(self.background, MapRender.BORDER_COLOR, bottom, top)
 
         #draw horizontal lines for grid
         for y in range(self.map.height+1):
             left = (0, y*MapRender.TILE_SIZE)
             right = (self.width*MapRender.TILE_SIZE, y*MapRender.TILE_SIZE)
-            pygame.draw.line(self.screen, MapRender.BORDER_COLOR, left, right)
+            pygame.draw.line(self.background, MapRender.BORDER_COLOR, left, right)
 
 
-    def building_render(self, building: Building):
-        '''Renders a building on the screen'''
+    def redraw_tile(self, x: int, y: int):
+        '''Redraws one tile (and its grid border) of the cached background'''
 
-        render_text = BuildingRender.text[building.type]
-        render_color = BuildingRender.BUILDING_COLOR[building.team]
+        if self.background is None:
+            return
 
-        text = font.SysFont('Comic Sans MS', 10).render(render_text, True, render_color)
+        rect = pygame.Rect(self.get_screen_coords(x, y))
+        pygame.draw.rect(self.background, self.map.get_tile_color(x, y), rect)
+        pygame.draw.rect(self.background, MapRender.BORDER_COLOR, rect.inflate(1, 1), 1)
 
-        (x1, y1), area = self.get_screen_coords(building.x, building.y)
 
-        self.screen.blit(text, ((x1 + MapRender.TILE_SIZE//4, y1 + MapRender.TILE_SIZE//4), area))
+    def map_render(self):
+        '''Renders the map background'''
+
+        if self.background is None:
+            self.build_background()
+
+        self.screen.blit(self.background, (0, 0))
+
+
+    '''
+    --------------------------------
+    GameStateListener (dirty cells)
+    --------------------------------
+    '''
+
+    def unit_added(self, unit: Unit):
+        self.units_at[(unit.x, unit.y)] = unit
+        self.dirty.add((unit.x, unit.y))
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        if self.units_at.get((old_x, old_y)) is unit:
+            del self.units_at[(old_x, old_y)]
+        self.units_at[(unit.x, unit.y)] = unit
+        self.dirty.add((old_x, old_y))
+        self.dirty.add((unit.x, unit.y))
+
+    def unit_removed(self, unit: Unit):
+        if self.units_at.get((unit.x, unit.y)) is unit:
+            del self.units_at[(unit.x, unit.y)]
+        self.dirty.add((unit.x, unit.y))
+
+    def building_added(self, building: Building):
+        self.buildings_at[(building.x, building.y)] = building
+        self.dirty.add((building.x, building.y))
+
+    def building_removed(self, building: Building):
+        if self.buildings_at.get((building.x, building.y)) is building:
+            del self.buildings_at[(building.x, building.y)]
+        self.dirty.add((building.x, building.y))
+
+    def tile_changed(self, x: int, y: int):
+        '''a bridge was built'''
+        self.redraw_tile(x, y)
+        self.dirty.add((x, y))
+
+
+    def render_changes(self) -> List[pygame.Rect]:
+        '''
+        Draws the map, buildings and units: everything on the first frame, only the dirty cells afterwards.
+        Returns the screen rectangles that were drawn, to be passed to pygame.display.update
+        '''
+
+        if self.full_redraw:
+            self.full_redraw = False
+            self.dirty.clear()
+
+            self.map_render()
+            for building in self.buildings_at.values():
+                self.building_render(building)
+            for unit in self.units_at.values():
+                self.unit_render(unit)
+
+            return [self.screen.get_rect()]
+
+        rects = [self.redraw_cell(x, y) for (x, y) in self.dirty]
+        self.dirty.clear()
+        return rects
+
+
+    def redraw_cell(self, x: int, y: int) -> pygame.Rect:
+        '''Redraws the background, building and unit of one cell on the screen'''
+
+        rect = pygame.Rect(self.get_screen_coords(x, y)).inflate(1, 1) #with the grid lines on all sides
+
+        self.screen.set_clip(rect)
+        self.screen.blit(self.background, rect, rect)
+
+        building = self.buildings_at.get((x, y))
+        if building is not None:
+            self.building_render(building)
+
+        unit = self.units_at.get((x, y))
+        if unit is not None:
+            self.unit_render(unit)
+
+        self.screen.set_clip(None)
+        return rect
+
+
+    def status_rect(self) -> pygame.Rect:
+        '''The area below the map with the turn and balances'''
+        top = self.height * MapRender.TILE_SIZE + 1 #below the bottom grid line
+        return pygame.Rect(0, top, self.screen.get_width(), self.screen.get_height() - top)
+
+
+    def clear_status(self) -> pygame.Rect:
+        '''Clears the status area for this frame's text and returns it'''
+        rect = self.status_rect()
+        self.screen.blit(self.background, rect, rect)
+        return rect
+
+
+    '''
+    ----
+    Text
+    ----
+    '''
+
+    def text_surface(self, text: str, color: Color) -> pygame.Surface:
+        '''Rendered text, cached per (text, color); for the small set of labels that are drawn over and over'''
+
+        key = (text, color)
+        surface = self.text_cache.get(key)
+
+        if surface is None:
+            surface = self.font.render(text, True, color)
+            self.text_cache[key] = surface
+
+        return surface
+
+
+    def blit_text(self, text: str, color: Color, position: Tuple[int, int]):
+        '''Draws text that changes often (ie the turn number) from glyphs cached per (character, color)'''
+
+        x, y = position
+
+        for char in text:
+            key = (char, color)
+            glyph = self.glyph_cache.get(key)
+
+            if glyph is None:
+                glyph = self.font.render(char, True, color)
+                self.glyph_cache[key] = glyph
+
+            self.screen.blit(glyph, (x, y))
+            x += glyph.get_width()
+
+
+    '''
+    ----------------
+    Units, buildings
+    ----------------
+    '''
+
+    def building_render(self, building: Building):
+        '''Renders a building on the screen'''
+        self.label_render(BuildingRender.text[building.type], BuildingRender.BUILDING_COLOR[building.team], building.x, building.y)
 
 
     def unit_render(self, unit: Unit):
         '''Renders a unit on the screen'''
+        self.label_render(UnitRender.text[unit.type], UnitRender.UNIT_COLOR[unit.team], unit.x, unit.y)
 
-        render_text = UnitRender.text[unit.type]
-        render_color = UnitRender.UNIT_COLOR[unit.team]
 
-        text = font.SysFont('Comic Sans MS', 10).render(render_text, True, render_color)
+    def label_render(self, render_text: str, render_color: Color, x: int, y: int):
+        '''Renders the label of a unit or building on its tile'''
 
-        (x1, y1), area = self.get_screen_coords(unit.x, unit.y)
+        text = self.text_surface(render_text, render_color)
+
+        (x1, y1), area = self.get_screen_coords(x, y)
 
         self.screen.blit(text, ((x1 + MapRender.TILE_SIZE//4, y1 + MapRender.TILE_SIZE//4), area))
-        
 
-    
 
+    def status_render(self, turn: int, blue_balance: int, red_balance: int):
+        '''Renders the turn and balances below the map'''
+
+        BLACK = (0, 0, 0)
+        top = self.height * MapRender.TILE_SIZE
+        self.blit_text(f'Turn: {turn}', BLACK, (5, top + 5))
+        self.blit_text(f'Blue balance: {blue_balance}', BLACK, (5, top + 20))
+        self.blit_text(f'Red balance: {red_balance}', BLACK, (5, top + 35))
@@ -0,0 +1,205 @@
+''' reading replay files (.awap25r) written by Game.export_replay '''
+
+import copy
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def expand_replay(replay: List[Dict]) -> List[Dict]:
+    '''
+    Expands the idle runs of a compact replay (Game(compact_replay=True)) into one entry per turn
+
+    An entry with "idle_turns": k stands for itself and the k turns after it, which repeat its game state
+    except for the turn number and each team's balance, which grows by "income" every turn.
+    Replays without idle runs are returned as is.
+    '''
+
+    expanded = []
+    for entry in replay:
+        expanded.extend(expand_entry(entry))
+    return expanded
+
+
+def expand_entry(entry: Dict) -> Iterator[Dict]:
+    '''
+    The entries of every turn an entry stands for: itself, and the turns of its idle run if it has one
+    Idle run turns are rebuilt from the entry (turn and balances advanced) and flagged "folded": True;
+    fields the replay did not record for them, ie time_remaining, are those of the entry
+    '''
+
+    idle_turns = entry.get("idle_turns")
+    if idle_turns is None:
+        yield entry
+        return
+
+    income = entry["income"]
+    first = {key: value for key, value in entry.items() if key not in ("idle_turns", "income")}
+    yield first
+
+    for i in range(1, idle_turns + 1):
+        game_state = copy.deepcopy(first["game_state"])
+        game_state["turn"] += i
+        for team, coins in income.items():
+            game_state["balance"][team] += i * coins
+
+        yield {"turn_number": first["turn_number"] + i, "game_state": game_state, "folded": True}
+
+
+def load_replay(filename: str) -> Dict:
+    '''Reads a replay file, with its idle runs expanded'''
+
+    with open(filename, 'r') as f:
+        data = json.load(f)
+
+    data["replay"] = expand_replay(data["replay"])
+    return data
+
+
+class ReplayStream:
+    '''
+    Reads a replay file one entry at a time instead of loading it whole
+
+    The top-level fields written before "replay" (map, map changes, winner, ...) are parsed on open into
+    self.header. entries() then decodes the replay list lazily, yielding each entry with its file offset,
+    so a reader can later restart from any entry it has seen. Replay files are ASCII (json.dump escapes
+    everything else), so offsets are byte offsets. Only one entries() generator should be used at a time.
+    '''
+
+    def __init__(self, filename: str, chunk_size: int = 1 << 16):
+        self.file = open(filename, 'rb')
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+
+        self.buffer = ''
+        self.position = 0 #next unread character of the buffer
+        self.buffer_offset = 0 #file offset of buffer[0]
+        self.eof = False
+
+        self.header: Dict = {}
+        self.replay_offset: Optional[int] = None #file offset of the first entry
+        self.read_header()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def entries(self, offset: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+        '''Yields (file offset, entry) for every replay entry, from the first one or from a previously yielded offset'''
+
+        self.seek(self.replay_offset if offset is None else offset)
+
+        while True:
+            self.skip_whitespace()
+            if self.peek() in (']', ''):
+                return
+
+            entry_offset = self.buffer_offset + self.position
+            entry = self.decode_value()
+            yield entry_offset, entry
+
+            self.skip_whitespace()
+            if self.peek() == ',':
+                self.position += 1
+
+
+    '''
+    -------
+    Parsing
+    -------
+    '''
+
+    def read_header(self):
+        self.skip_whitespace()
+        self.expect('{')
+
+        while True:
+            self.skip_whitespace()
+            if self.peek() in ('}', ''):
+                return
+
+            key = self.decode_value()
+            self.skip_whitespace()
+            self.expect(':')
+            self.skip_whitespace()
+
+            if key == "replay":
+                self.expect('[')
+                self.replay_offset = self.buffer_offset + self.position
+                return
+
+            self.header[key] = self.decode_value()
+            self.skip_whitespace()
+            if self.peek() == ',':
+                self.position += 1
+
+
+    def seek(self, offset: int):
+        self.file.seek(offset)
+        self.buffer = ''
+        self.position = 0
+        self.buffer_offset = offset
+        self.eof = False
+
+
+    def fill(self, size: int) -> bool:
+        '''Reads at least size more characters into the buffer (dropping what was consumed); False at the end of the file'''
+
+        if self.eof:
+            return False
+
+        chunk = self.file.read(max(size, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer_offset += self.position
+        self.buffer = self.buffer[self.position:] + chunk.decode('ascii')
+        self.position = 0
+        return True
+
+
+    def peek(self) -> str:
+        '''The next unread character, or '' at the end of the file'''
+        while self.position >= len(self.buffer):
+            if not self.fill(self.chunk_size):
+                return ''
+        return self.buffer[self.position]
+
+
+    def skip_whitespace(self):
+        while self.peek() in (' ', '\n', '\r', '\t'):
+            self.position += 1
+
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f'Malformed replay: expected {char!r} at offset {self.buffer_offset + self.position}')
+        self.position += 1
+
+
+    def decode_value(self):
+        '''
+        Decodes the JSON value at the current position, reading more of the file until it is complete
+        (each retry at least doubles the buffer, so large values are still read in linear time)
+        '''
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill(len(self.buffer)):
+                    raise
+                continue
+
+            #a number that ends with the buffer may continue in the file
+            if end == len(self.buffer) and self.fill(len(self.buffer)):
+                continue
+
+            self.position = end
+            return value
@@ -0,0 +1,168 @@
+''' per-turn metrics extracted from replays into columnar NumPy tables, over whole directories in parallel '''
+
+import csv
+import glob
+import multiprocessing
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.game_constants import GameConstants, Team
+from src.replay import ReplayStream, expand_entry
+
+FORMATS = ('npz', 'csv')
+
+#per team metrics, as columns "<team>_<metric>" (ie "blue_units"); -1 where a replay does not record the value
+TEAM_METRICS = (
+    'units', # units alive
+    'buildings', # buildings standing
+    'unit_health', # total health of the units alive
+    'balance',
+    'income', # coins gained this turn: passive income plus farms
+    'asset_value', # total cost of the units and buildings alive
+    'castle_health', # main castle health, 0 once destroyed
+    'damage_dealt', # health lost by the enemy's units and buildings this turn (see extract_metrics)
+    'units_lost', # units removed this turn
+)
+FLOAT_TEAM_METRICS = (
+    'time_remaining', # seconds left in the time pool, NaN on the turns of idle runs (not recorded)
+)
+
+
+def column_names() -> List[str]:
+    names = ['turn']
+    for metric in TEAM_METRICS + FLOAT_TEAM_METRICS:
+        names.extend(f'{team.name.lower()}_{metric}' for team in Team)
+    return names
+
+
+def extract_metrics(replay_file: str) -> Dict[str, np.ndarray]:
+    '''
+    Streams a replay and returns one array per column (see column_names), one row per turn
+
+    Replays only hold snapshots, so damage is inferred from them: damage dealt by a team is the health its
+    enemy's units and buildings lost between two turns, with removed ones counted at their last health
+    (this includes the rare sold unit or building, and misses damage healed within the same turn).
+    '''
+
+    rows: Dict[str, list] = {name: [] for name in column_names()}
+    last_health: Dict[Team, Dict[tuple, int]] = {team: {} for team in Team}
+
+    with ReplayStream(replay_file) as stream:
+        for _, entry in stream.entries():
+            for step in expand_entry(entry):
+                game_state = step["game_state"]
+                rows['turn'].append(game_state["turn"])
+
+                health = {}
+                for team in Team:
+                    units = game_state["units"].get(team.name, [])
+                    buildings = game_state["buildings"].get(team.name, [])
+                    health[team] = {('unit', unit["id"]): unit["health"] for unit in units}
+                    health[team].update({('building', building["id"]): building["health"] for building in buildings})
+
+                for team in Team:
+                    name = team.name.lower()
+                    units = game_state["units"].get(team.name, [])
+                    enemy = Team.RED if team == Team.BLUE else Team.BLUE
+
+                    damage = 0
+                    for key, before in last_health[enemy].items():
+                        damage += max(before - max(health[enemy].get(key, 0), 0), 0)
+
+                    units_lost = sum(1 for key in last_health[team] if key[0] == 'unit' and key not in health[team])
+
+                    farm_income = game_state.get("farm_income", {}).get(team.name)
+
+                    rows[f'{name}_units'].append(len(units))
+                    rows[f'{name}_buildings'].append(len(game_state["buildings"].get(team.name, [])))
+                    rows[f'{name}_unit_health'].append(sum(unit["health"] for unit in units))
+                    rows[f'{name}_balance'].append(game_state["balance"][team.name])
+                    rows[f'{name}_income'].append(-1 if farm_income is None else GameConstants.PASSIVE_COINS_PER_TURN + farm_income)
+                    rows[f'{name}_asset_value'].append(game_state.get("asset_value", {}).get(team.name, -1))
+                    rows[f'{name}_castle_health'].append(game_state.get("castle_health", {}).get(team.name, -1))
+                    rows[f'{name}_damage_dealt'].append(damage)
+                    rows[f'{name}_units_lost'].append(units_lost)
+                    if step.get("folded"):
+                        rows[f'{name}_time_remaining'].append(np.nan) #bots still spent time on folded turns
+                    else:
+                        rows[f'{name}_time_remaining'].append(game_state.get("time_remaining", {}).get(team.name, -1))
+
+                last_health = health
+
+        header = stream.header
+
+    metrics = {}
+    for name, values in rows.items():
+        dtype = np.float64 if name.endswith(FLOAT_TEAM_METRICS) else np.int64
+        metrics[name] = np.array(values, dtype=dtype)
+
+    metrics['winner'] = np.array(header.get("winner_color") or '')
+    metrics['end_reason'] = np.array(header.get("end_reason") or '')
+    return metrics
+
+
+def write_metrics(metrics: Dict[str, np.ndarray], path: str, format: str = 'npz'):
+    '''Writes the table of a game: an .npz of named arrays, or a .csv with one row per turn'''
+
+    if format == 'npz':
+        np.savez_compressed(path, **metrics)
+        return
+
+    names = column_names()
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(zip(*(metrics[name].tolist() for name in names)))
+
+
+def analyze_replay(replay_file: str, out_dir: str, format: str = 'npz') -> Dict:
+    '''Extracts and writes the table of one replay (one process pool job); returns its summary row'''
+
+    metrics = extract_metrics(replay_file)
+
+    name = os.path.splitext(os.path.basename(replay_file))[0]
+    write_metrics(metrics, os.path.join(out_dir, f'{name}.{format}'), format)
+
+    last = {column: values[-1].item() if values.size else -1 for column, values in metrics.items() if values.ndim == 1}
+    return {
+        'replay': replay_file,
+        'turns': len(metrics['turn']),
+        'winner': metrics['winner'].item(),
+        'end_reason': metrics['end_reason'].item(),
+        **{f'final_{column}': value for column, value in last.items() if column != 'turn'},
+        'total_blue_damage_dealt': int(metrics['blue_damage_dealt'].sum()),
+        'total_red_damage_dealt': int(metrics['red_damage_dealt'].sum()),
+    }
+
+
+def analyze_directory(replay_dir: str, out_dir: str, format: str = 'npz', workers: Optional[int] = None) -> List[Dict]:
+    '''
+    Writes the per-turn table of every replay (*.awap25r) in a directory to out_dir, plus a summary.csv
+    with one row per game; replays are analyzed by a pool of worker processes. Returns the summary rows
+    '''
+
+    if format not in FORMATS:
+        raise ValueError(f'Unknown table format {format}, expected one of {FORMATS}')
+
+    replay_files = sorted(glob.glob(os.path.join(replay_dir, '*.awap25r')))
+    os.makedirs(out_dir, exist_ok=True)
+
+    jobs = [(replay_file, out_dir, format) for replay_file in replay_files]
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+
+    if workers == 1:
+        summary = [analyze_replay(*job) for job in jobs]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(processes=workers) as pool:
+            summary = pool.starmap(analyze_replay, jobs, chunksize=1)
+
+    if summary:
+        with open(os.path.join(out_dir, 'summary.csv'), 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(summary[0].keys()))
+            writer.writeheader()
+            writer.writerows(summary)
+
+    return summary
@@ -2,9 +2,11 @@
 This file contains all the functions that a player can call in their bot
 '''
 
-import copy, math
+import copy, heapq, math, random
 from typing import List, Optional, Dict, Tuple
 
+import numpy as np
+
 from src.exceptions import GameException
 
 from src.game_constants import Team, UnitType, BuildingType, Direction, Tile
@@ -14,14 +16,74 @@ from src.units import Unit
 from src.buildings import Building
 from src.game_constants import GameConstants
 from src.game_state import GameState
+from src.state_listener import GameStateListener
+from src.events import Event, EventType, EventWatch
+from src.attack_targets import AttackTargets
+from src.threat_map import ThreatMap
+
+# every direction that leaves the current cell
+MOVE_DIRECTIONS = [direction for direction in Direction if direction != Direction.STAY]
+
+
+class SleepWatch(GameStateListener):
+    '''
+    Follows the game state while a team sleeps (see RobotController.sleep_until), and flags it as woken when
+      - one of its units or buildings is updated (ie damaged) or removed, or
+      - with a wake_radius, an enemy unit is placed or moves within that (Chebyshev) distance of one of them
+    '''
+
+    def __init__(self, game_state: GameState, team: Team, wake_turn: int, wake_radius: Optional[int]):
+        self.game_state = game_state
+        self.team = team
+        self.wake_turn = wake_turn
+        self.wake_radius = wake_radius
+        self.woken = False
+
+    def enemy_near(self, unit: Unit):
+        if unit.team == self.team or self.wake_radius is None or self.woken:
+            return
+
+        #only the tiles within wake_radius of the enemy are looked at, buildings only if no unit is there
+        game_state = self.game_state
+        self.woken = (
+            bool(game_state.units_within(self.team, unit.x, unit.y, self.wake_radius))
+            or bool(game_state.buildings_within(self.team, unit.x, unit.y, self.wake_radius))
+        )
+
+    def own_changed(self, obj):
+        if obj.team == self.team:
+            self.woken = True
+
+    def unit_added(self, unit: Unit):
+        self.enemy_near(unit)
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        self.enemy_near(unit)
+
+    def unit_updated(self, unit: Unit):
+        self.own_changed(unit)
+
+    def unit_removed(self, unit: Unit):
+        self.own_changed(unit)
+
+    def building_updated(self, building: Building):
+        self.own_changed(building)
+
+    def building_removed(self, building: Building):
+        self.own_changed(building)
+
 
 
 class RobotController:
     
-    def __init__(self, team: Team, game_state: GameState):
+    def __init__(self, team: Team, game_state: GameState, rng: Optional[random.Random] = None):
 
         self.__team = team # Red team or Blue team
         self.__game_state = game_state # The shared game state
+        self.__rng = rng if rng is not None else random.Random() # Per-team random generator, seeded by the game if given a seed
+        self.__sleep: Optional[SleepWatch] = None # set while the bot sleeps (see sleep_until)
+        self.__events: Optional[EventWatch] = None # created on the first subscription
+        self.__targets: Optional[AttackTargets] = None # created on the first attackable_targets / all_attack_options
 
 
     '''
@@ -34,6 +96,13 @@ class RobotController:
         '''Gets the current turn of the game'''
         return self.__game_state.turn
 
+    def get_random(self) -> random.Random:
+        '''
+        Returns this team's random number generator
+        Use it instead of the random module so that seeded games (run_game.py --seed) are reproducible
+        '''
+        return self.__rng
+
     def get_ally_team(self) -> Team:
         '''Gets player's team, returning either Team.RED or Team.BLUE'''
         return self.__team
@@ -82,6 +151,26 @@ class RobotController:
     def get_balance(self, team: Team) -> int:
         '''Gets the gold balance of a certain team'''
         return self.__game_state.balance[team]
+
+
+    def get_asset_value(self, team: Team) -> int:
+        '''Gets the total cost of all of a team's units and buildings'''
+        return self.__game_state.asset_value[team]
+
+
+    def get_net_worth(self, team: Team) -> int:
+        '''Gets a team's balance plus asset value, the score that breaks ties at the turn limit'''
+        return self.__game_state.get_net_worth(team)
+
+
+    def get_farm_income(self, team: Team) -> int:
+        '''Gets the coins a team's farms make per turn (on top of the passive income)'''
+        return self.__game_state.farm_income[team]
+
+
+    def get_castle_health(self, team: Team) -> int:
+        '''Gets the health of a team's main castle, 0 once it is destroyed'''
+        return self.__game_state.get_castle_health(team)
     
 
     def get_team_of_unit(self, unit_id: int) -> Optional[Team]:
@@ -120,6 +209,18 @@ class RobotController:
         return copy.deepcopy(self.__game_state.get_building_from_id(building_id))
     
 
+    def __team_unit(self, unit_id: int, team: Team) -> Optional[Unit]:
+        '''The actual unit given by its id if it belongs to team, None otherwise (a single index lookup)'''
+        unit = self.__game_state.unit_index.get(unit_id)
+        return unit if unit is not None and unit.team == team else None
+    
+
+    def __team_building(self, building_id: int, team: Team) -> Optional[Building]:
+        '''The actual building given by its id if it belongs to team, None otherwise (a single index lookup)'''
+        building = self.__game_state.building_index.get(building_id)
+        return building if building is not None and building.team == team else None
+    
+
     def get_id_from_unit(self, unit: Unit) -> Tuple[Team, int]:
         '''
         Returns (unit team, unit ID) from a given unit
@@ -227,12 +328,12 @@ class RobotController:
         Distance is calculated such that the euclidian distance between the object and the point must be less than or equal to radius
         '''
 
-        if unit_id not in self.__game_state.units[team]:
+        unit = self.__team_unit(unit_id, team)
+        if unit is None:
             print("sense_objects_within_unit_range(): Not valid unit_id")
             return ([], []) # returns nothing if unit_id is invalid
         
-        unit = self.__game_state.units[team][unit_id]
-        return self.sense_objects_within_radius(team, unit.x, unit.y, unit.range)
+        return self.sense_objects_within_radius(team, unit.x, unit.y, unit.attack_range)
 
 
     def sense_objects_within_building_range(self, team: Team, building_id: int) -> Tuple[List[Unit], List[Building]]:
@@ -241,12 +342,78 @@ class RobotController:
         
         Distance is calculated such that the euclidian distance between the object and the point must be less than or equal to radius
         '''
-        if building_id not in self.__game_state.buildings[team]:
+        building = self.__team_building(building_id, team)
+        if building is None:
             print("sense_objects_within_building_range(): Not valid building id")
             return ([], []) # returns nothing if building_id is invalid
         
-        unit = self.__game_state.units[team][building_id]
-        return self.sense_objects_within_radius(team, unit.x, unit.y, unit.range)
+        return self.sense_objects_within_radius(team, building.x, building.y, building.attack_range)
+
+
+    def attackable_targets(self, unit_id: int) -> Tuple[List[int], List[int]]:
+        '''
+        Returns ([enemy unit ids], [enemy building ids]) that an ally unit can attack this turn, each in id order,
+        ie every target for which can_unit_attack_unit / can_unit_attack_building is True
+
+        Targets are looked up on the tiles in range and cached until something changes within range,
+        so calling this every time a unit acts is cheap. Empty if the unit has no actions left.
+        '''
+
+        unit = self.__team_unit(unit_id, self.__team)
+        if unit is None:
+            print("attackable_targets(): invalid unit_id")
+            return ([], [])
+
+        if unit.turn_actions_remaining <= 0:
+            return ([], [])
+
+        unit_ids, building_ids = self.__attack_targets().get(unit)
+        return list(unit_ids), list(building_ids)
+
+
+    def all_attack_options(self, team: Team) -> Dict[int, Tuple[List[int], List[int]]]:
+        '''
+        Returns {unit id: ([enemy unit ids], [enemy building ids])} for every unit of a team that has actions left
+        and at least one enemy in attack range (see attackable_targets); the enemy team's units can be queried too
+        '''
+
+        attack_targets = self.__attack_targets()
+        options = {}
+
+        for unit in self.__game_state.units[team].values():
+            if unit.turn_actions_remaining <= 0:
+                continue
+
+            unit_ids, building_ids = attack_targets.get(unit)
+            if unit_ids or building_ids:
+                options[unit.id] = (list(unit_ids), list(building_ids))
+
+        return options
+
+
+    def get_threat_map(self, team: Optional[Team] = None) -> np.ndarray:
+        '''
+        Returns a read-only NumPy grid indexed [x][y] of the summed damage the enemies of team (the ally team
+        by default) could deal to each cell next turn, from their units' positions, move_range, attack_range
+        and damage (see src/threat_map.py). Terrain is ignored, so a cell at 0 is out of every enemy's reach.
+
+        The engine keeps the grid up to date as units spawn, move and die, so this costs one array copy.
+        The copy is a snapshot that will not follow later moves: ask again after the game state changes.
+        '''
+
+        game_state = self.__game_state
+        if game_state.threat_map is None:
+            game_state.threat_map = ThreatMap(game_state)
+
+        return game_state.threat_map.snapshot(self.__team if team is None else team)
+
+
+    def __attack_targets(self) -> AttackTargets:
+        if self.__targets is None:
+            self.__targets = AttackTargets(self.__game_state)
+            self.__game_state.add_listener(self.__targets)
+
+        return self.__targets
 
 
     '''
@@ -272,6 +439,11 @@ class RobotController:
             print('can_spawn_unit(): invalid building id')
             return False
 
+        return self.__can_spawn_from(unit_type, building)
+
+    def __can_spawn_from(self, unit_type: UnitType, building: Building) -> bool:
+        '''can_spawn_unit, given the (valid) building object itself'''
+
         #check if building's team is correct
         if building.team != self.__team:
             return False
@@ -446,28 +618,16 @@ class RobotController:
         '''
 
         # are ids valid?
-        if attacking_unit_id not in self.__game_state.units[self.__team]:
-            print("can_unit_attack_unit(): invalid attacking_unit_id")
-            return False
-        
-        if target_unit_id not in self.__game_state.units[self.get_enemy_team()]:
-            print("can_unit_attack_unit(): invalid target_unit_id")
-            return False
-
-
-        attacking_unit = self.__game_state.get_unit_from_id(attacking_unit_id)
-        target_unit = self.__game_state.get_unit_from_id(target_unit_id)
-
-        # basic validity
+        attacking_unit = self.__team_unit(attacking_unit_id, self.__team)
         if attacking_unit is None:
-            print('can_unit_attack_unit(): invalid attacking unit id')
+            print("can_unit_attack_unit(): invalid attacking_unit_id")
             return False
         
+        target_unit = self.__team_unit(target_unit_id, self.get_enemy_team())
         if target_unit is None:
-            print('can_unit_attack_unit(): invalid target unit id')
+            print("can_unit_attack_unit(): invalid target_unit_id")
             return False
 
-
         # has unit attacked this turn?
         if attacking_unit.turn_actions_remaining <= 0:
             return False #cannot attack again
@@ -488,26 +648,14 @@ class RobotController:
         '''
 
         # are ids valid?
-        if attacking_unit_id not in self.__game_state.units[self.__team]:
+        attacking_unit = self.__team_unit(attacking_unit_id, self.__team)
+        if attacking_unit is None:
             print("can_unit_attack_building(): invalid attacking_unit_id")
             return False
         
-        if target_building_id not in self.__game_state.buildings[self.get_enemy_team()]:
-            print("can_unit_attack_building(): invalid target_building_id")
-            return False
-
-
-        attacking_unit = self.__game_state.get_unit_from_id(attacking_unit_id)
-        target_building = self.__game_state.get_building_from_id(target_building_id)
-
-
-        # basic validity
-        if attacking_unit is None:
-            print('can_spawn_unit(): invalid attacking unit id')
-            return False
-
+        target_building = self.__team_building(target_building_id, self.get_enemy_team())
         if target_building is None:
-            print('can_unit_attack_building(): invalid target building id')
+            print("can_unit_attack_building(): invalid target_building_id")
             return False
 
         # has unit attacked this turn?
@@ -530,7 +678,8 @@ class RobotController:
         '''
 
         # are ids valid?
-        if attacking_unit_id not in self.__game_state.units[self.__team]:
+        attacking_unit = self.__team_unit(attacking_unit_id, self.__team)
+        if attacking_unit is None:
             print("can_unit_attack_building(): invalid attacking_unit_id")
             return False
         
@@ -538,13 +687,6 @@ class RobotController:
         if not self.__game_state.map.in_bounds(x, y):
             print('can_unit_attack_location(): invalid (x, y) given')
             return False
-        
-        attacking_unit = self.__game_state.get_unit_from_id(attacking_unit_id)
-
-        # basic validity
-        if attacking_unit is None:
-            print('can_unit_attack_location(): invalid attacking unit id')
-            return False
 
         # has unit attacked this turn?
         if attacking_unit.turn_actions_remaining <= 0:
@@ -565,25 +707,14 @@ class RobotController:
         Attacking building must be from player's team, and target unit must be from opponent's team
         '''
         # are ids valid?
-        if attacking_building_id not in self.__game_state.buildings[self.__team]:
+        attacking_building = self.__team_building(attacking_building_id, self.__team)
+        if attacking_building is None:
             print("can_building_attack_unit(): invalid attacking_building_id")
             return False
         
-        if target_unit_id not in self.__game_state.units[self.get_enemy_team()]:
-            print("can_building_attack_unit(): invalid target_unit_id")
-            return False
-
-
-        attacking_building = self.__game_state.get_building_from_id(attacking_building_id)
-        target_unit = self.__game_state.get_unit_from_id(target_unit_id)
-
-        # basic validity
-        if attacking_building is None:
-            print('can_building_attack_unit(): invalid attacking building id')
-            return False
-
+        target_unit = self.__team_unit(target_unit_id, self.get_enemy_team())
         if target_unit is None:
-            print('can_building_attack_unit(): invalid target unit id')
+            print("can_building_attack_unit(): invalid target_unit_id")
             return False
 
         # has unit attacked this turn?
@@ -607,7 +738,8 @@ class RobotController:
         '''
 
         # are ids valid?
-        if attacking_building_id not in self.__game_state.buildings[self.__team]:
+        attacking_building = self.__team_building(attacking_building_id, self.__team)
+        if attacking_building is None:
             print("can_building_attack_location(): invalid attacking_building_id")
             return False
         
@@ -615,14 +747,6 @@ class RobotController:
             print('can_unit_attack_location(): invalid (x, y) given')
             return False
 
-
-        attacking_building = self.__game_state.get_building_from_id(attacking_building_id)
-
-        # basic validity
-        if attacking_building is None:
-            print('can_building_attack_location(): invalid attacking building id')
-            return False
-
         # has unit attacked this turn?
         if attacking_building.turn_actions_remaining <= 0:
             return False #cannot attack again
@@ -652,88 +776,45 @@ class RobotController:
         if not self.can_unit_attack_location(attacking_unit_id, x, y):
             return False
 
-        enemy_team = self.get_enemy_team()
         attacking_unit = self.__game_state.get_unit_from_id(attacking_unit_id)
 
         # basic validity
         if attacking_unit is None: 
             return False
 
+        return self.__resolve_unit_attack(attacking_unit, x, y)
 
-        # get all opponents within damage range
-        #list of ids
-        opponent_units_hit: List[int] = []
-        opponent_buildings_hit: List[int] = []
 
+    def __resolve_unit_attack(self, attacking_unit: Unit, x: int, y: int) -> bool:
+        '''
+        Applies an (already validated) attack of an ally unit on location (x, y):
+        damages enemies within damage range, then takes retaliation damage
+        '''
 
-        #sense all opponents hit
-        for unit in self.__game_state.units[enemy_team].values():
-            #if chebyshev distance between unit and target <= damage range, then hit
-            if self.chebyshev_distance_valid(unit.x, unit.y, x, y, attacking_unit.damage_range):
-                opponent_units_hit.append(unit.id)
+        game_state = self.__game_state
+        enemy_team = self.get_enemy_team()
+        attacking_unit_id = attacking_unit.id
+        damage = attacking_unit.damage
 
-        for building in self.__game_state.buildings[enemy_team].values():
-            #if chebyshev distance between unit and target <= damage range, then hit
-            if self.chebyshev_distance_valid(building.x, building.y, x, y, attacking_unit.damage_range):
-                opponent_buildings_hit.append(building.id)
+        # get all opponents within damage range (only the tiles in range are visited)
+        opponent_units_hit = game_state.units_within(enemy_team, x, y, attacking_unit.damage_range)
+        opponent_buildings_hit = game_state.buildings_within(enemy_team, x, y, attacking_unit.damage_range)
 
         #unit actions per turn decrement
         attacking_unit.turn_actions_remaining -= 1
+        game_state.notify('unit_updated', attacking_unit)
 
-        #damage opponent's units
-        i = 0
-        while i < len(opponent_units_hit):
-            unit_id_hit = opponent_units_hit[i]
-            #if opponent unit killed, then delete it from the list because they cannot retaliate
-            if self.__game_state.damage_unit(unit_id_hit, attacking_unit.damage):
-                del opponent_units_hit[i] #delete it here to not mess up the indexing
-                i -= 1
-            i += 1
-            
-
-
-        #damage opponent's buildings
-        i = 0
-        while i < len(opponent_buildings_hit): #len dynamically changes
-            building_id_hit = opponent_buildings_hit[i]
-            #if opponent building defeated, then delete from the list because they cannot retaliate
-            if self.__game_state.damage_building(building_id_hit, attacking_unit.damage):
-                del opponent_buildings_hit[i]
-                i -= 1
-            i += 1
-
-
+        #damage opponents; the killed/defeated ones cannot retaliate
+        surviving_units = [unit for unit in opponent_units_hit if not game_state.damage_unit(unit.id, damage)]
+        surviving_buildings = [building for building in opponent_buildings_hit if not game_state.damage_building(building.id, damage)]
 
         #retaliation: damage player's unit if opponent is not killed and player in range
-        for enemy_unit_id in opponent_units_hit:
-            enemy_unit = self.__game_state.get_unit_from_id(enemy_unit_id)
-
-            # basic validity
-            if enemy_unit is None:
-                print('unit_attack_location(): invalid enemy unit id')
-                return False
-            
+        for enemy in surviving_units + surviving_buildings:
             #if attacking unit is out of range of retaliation, move on
-            if self.get_chebyshev_distance(attacking_unit.x, attacking_unit.y, enemy_unit.x, enemy_unit.y) > enemy_unit.attack_range:
+            if self.get_chebyshev_distance(attacking_unit.x, attacking_unit.y, enemy.x, enemy.y) > enemy.attack_range:
                 continue
 
-            if self.__game_state.damage_unit(attacking_unit_id, enemy_unit.defense):
-                return True #if killed, then simply return
-            
-        
-        for enemy_building_id in opponent_buildings_hit:
-            enemy_building = self.__game_state.get_building_from_id(enemy_building_id)
-
-            # basic validity
-            if enemy_building is None:
-                print('unit_attack_location(): invalid enemy building id')
-                return False
-            
-            #if the attacking building is out of range of retaliation, move on
-            if self.get_chebyshev_distance(attacking_unit.x, attacking_unit.y, enemy_building.x, enemy_building.y) > enemy_building.attack_range:
-                continue
-
-            if self.__game_state.damage_unit(attacking_unit_id, enemy_building.defense):
+            if game_state.damage_unit(attacking_unit_id, enemy.defense):
                 return True #if killed, then simply return
 
         return True
@@ -816,26 +897,16 @@ class RobotController:
             return False
 
 
-        # get all opponents within damage range
-        #list of ids
-        opponent_units_hit: List[int] = []
-
-        #sense all opponents (only units) hit
-        for unit in self.__game_state.units[enemy_team].values():
-            #if chebyshev distance between unit and target <= damage range, then hit
-            if self.chebyshev_distance_valid(unit.x, unit.y, x, y, attacking_building.damage_range):
-                opponent_units_hit.append(unit.id)
-
+        # get all opponents (only units) within damage range (only the tiles in range are visited)
+        opponent_units_hit = self.__game_state.units_within(enemy_team, x, y, attacking_building.damage_range)
 
         #buliding actions per turn decrement
         attacking_building.turn_actions_remaining -= 1
+        self.__game_state.notify('building_updated', attacking_building)
 
         #damage opponent's units
-        for i in range(len(opponent_units_hit)):
-            unit_id_hit = opponent_units_hit[i]
-            #if opponent unit killed, then delete it from the list because they cannot retaliate
-            if self.__game_state.damage_unit(unit_id_hit, attacking_building.damage):
-                del opponent_units_hit[i]
+        for unit in opponent_units_hit:
+            self.__game_state.damage_unit(unit.id, attacking_building.damage)
 
 
         #no retaliation damage taken for buildings
@@ -901,15 +972,72 @@ class RobotController:
         Given an ALLY unit id (and thus its location), return a list of valid directions that the unit can move in
         '''
 
-        res = []
+        unit = self.__team_unit(unit_id, self.__team)
+        if unit is None:
+            print("unit_possible_move_directions(): invalid ally unit_id")
+            return []
 
         #check each direction
-        for dir in Direction:
-            if self.can_move_unit_in_direction(unit_id, dir):
-                res.append(dir)
-        
-        return res
-        
+        return [dir for dir in Direction if self.__can_move(unit, dir)]
+
+
+    def reachable_cells(self, unit_id: int) -> Dict[Tuple[int, int], int]:
+        '''
+        Given an ALLY unit id, returns {(x, y): movement cost} for every cell the unit can reach this turn
+        with its turn_movement_remaining, through tiles it can walk on that no other unit occupies.
+        Its own cell is included at cost 0. Each step costs the movement_cost of the tile stepped onto.
+        '''
+
+        unit = self.__team_unit(unit_id, self.__team)
+        if unit is None:
+            print("reachable_cells(): invalid ally unit_id")
+            return {}
+
+        return self.__reachable(unit)
+
+
+    def all_reachable_cells(self) -> Dict[int, Dict[Tuple[int, int], int]]:
+        '''
+        Returns {unit id: reachable_cells(unit id)} for every ally unit, each computed
+        as if the other units stay where they are
+        '''
+
+        return {unit.id: self.__reachable(unit) for unit in self.__game_state.units[self.__team].values()}
+
+
+    def __reachable(self, unit: Unit) -> Dict[Tuple[int, int], int]:
+        '''Dijkstra from the unit's cell, bounded by its movement remaining, over the shared unit_placeable_map'''
+
+        game_map = self.__game_state.map
+        tiles = game_map.tiles
+        free = self.__game_state.unit_placeable_map
+        walkable = unit.walkable_tiles
+        budget = unit.turn_movement_remaining
+
+        costs = {(unit.x, unit.y): 0}
+        heap = [(0, unit.x, unit.y)]
+
+        while heap:
+            cost, x, y = heapq.heappop(heap)
+            if cost > costs[(x, y)]:
+                continue #already reached more cheaply
+
+            for direction in MOVE_DIRECTIONS:
+                next_x, next_y = x + direction.dx, y + direction.dy
+                if not game_map.in_bounds(next_x, next_y) or not free[next_x][next_y]:
+                    continue
+
+                tile = tiles[next_x][next_y]
+                if tile not in walkable:
+                    continue
+
+                next_cost = cost + tile.movement_cost
+                if next_cost <= budget and next_cost < costs.get((next_x, next_y), budget + 1):
+                    costs[(next_x, next_y)] = next_cost
+                    heapq.heappush(heap, (next_cost, next_x, next_y))
+
+        return costs
+
 
 
     def can_move_unit_in_direction(self, unit_id: int, direction: Direction) -> bool:
@@ -921,17 +1049,17 @@ class RobotController:
         '''
         
         # is id valid?
-        if unit_id not in self.__game_state.units[self.__team]:
+        unit = self.__team_unit(unit_id, self.__team)
+        if unit is None:
             print("can_move_unit_in_direction(): invalid ally unit_id")
             return False
 
 
-        unit = self.__game_state.get_unit_from_id(unit_id)
-        
-        #basic validity
-        if unit is None:
-            return False
-        
+        return self.__can_move(unit, direction)
+
+
+    def __can_move(self, unit: Unit, direction: Direction) -> bool:
+        '''can_move_unit_in_direction, given the (valid) ally unit object itself'''
 
         #check if the ending position is valid
         dest_x, dest_y = self.new_location(unit.x, unit.y, direction)
@@ -973,7 +1101,14 @@ class RobotController:
         #basic validity
         if unit is None:
             return False
-        
+
+        self.__apply_move(unit, direction)
+        return True
+
+
+    def __apply_move(self, unit: Unit, direction: Direction):
+        '''Moves an ally unit in an (already validated) direction'''
+
         dest_x, dest_y = self.new_location(unit.x, unit.y, direction)
 
         #reduce unit movements
@@ -982,15 +1117,136 @@ class RobotController:
 
         # update unit_pleaceable map (old is now free)
         self.__game_state.unit_placeable_map[unit.x][unit.y] = True
+        self.__game_state.unit_grid[unit.x][unit.y] = None
 
         #update location
+        old_x, old_y = unit.x, unit.y
         unit.x = dest_x
         unit.y = dest_y
 
         # update unit_pleaceable map (new is now taken)
         self.__game_state.unit_placeable_map[unit.x][unit.y] = False
+        self.__game_state.unit_grid[unit.x][unit.y] = unit
 
-        return True
+        self.__game_state.notify('unit_moved', unit, old_x, old_y)
+
+
+    '''
+    -----------------------------
+    Batched Action Functionalities
+    -----------------------------
+    '''
+
+    # actions that submit_actions accepts, named after the RobotController method they stand for
+    BATCH_ACTIONS = {
+        "move_unit_in_direction",
+        "unit_attack_location",
+        "unit_attack_unit",
+        "unit_attack_building",
+        "spawn_unit",
+        "build_building",
+        "building_attack_location",
+        "building_attack_unit",
+        "sell_unit",
+        "sell_building",
+        "disband_unit",
+        "destroy_building",
+        "explore_for_gold",
+        "explore_for_health",
+        "explore_for_attack",
+        "explore_for_defense",
+        "build_bridge",
+        "heal_unit",
+        "harm_farm",
+    }
+
+    def submit_actions(self, actions: List[Tuple]) -> List[bool]:
+        '''
+        Validates and applies a list of actions in one pass, returning each action's result (True if applied)
+
+        Each action is a tuple of a RobotController method name followed by that method's arguments, ie
+          ("move_unit_in_direction", unit_id, Direction.UP)
+          ("unit_attack_unit", unit_id, target_unit_id)
+          ("unit_attack_building", unit_id, target_building_id)
+          ("unit_attack_location", unit_id, x, y)
+          ("spawn_unit", UnitType.KNIGHT, building_id)
+          ("build_building", BuildingType.FARM_1, x, y)
+
+        Moves, attacks, spawns and builds share their id lookups and are validated once, which is much
+        cheaper than calling can_...() and then the action for every unit. The other actions in BATCH_ACTIONS
+        are forwarded to their method. Actions are applied in order, so later actions see the effects
+        of earlier ones (ie a unit killed by an earlier attack cannot move). Invalid actions fail silently with a
+        False result, including stale ids and malformed tuples; only an unknown action name raises a GameException.
+        '''
+
+        game_state = self.__game_state
+        game_map = game_state.map
+        team = self.__team
+
+        ally_units = game_state.units[team]
+        ally_buildings = game_state.buildings[team]
+        enemy_units = game_state.units[self.get_enemy_team()]
+        enemy_buildings = game_state.buildings[self.get_enemy_team()]
+
+        results = []
+
+        for action in actions:
+            name = action[0] if isinstance(action, (tuple, list)) and action and isinstance(action[0], str) else None
+            if name is not None and name not in self.BATCH_ACTIONS:
+                raise GameException(f"submit_actions(): unknown action {name}")
+
+            #a stale id or a missing/bad argument fails this action only, the rest of the batch still runs
+            try:
+                if name is None:
+                    res = False #not a (name, *args) tuple
+
+                elif name == "move_unit_in_direction":
+                    unit = ally_units.get(action[1])
+                    res = unit is not None and self.__can_move(unit, action[2])
+                    if res:
+                        self.__apply_move(unit, action[2])
+
+                elif name in ("unit_attack_unit", "unit_attack_building", "unit_attack_location"):
+                    unit = ally_units.get(action[1])
+
+                    if name == "unit_attack_location":
+                        x, y = action[2], action[3]
+                        valid_target = game_map.in_bounds(x, y)
+                    else:
+                        target = enemy_units.get(action[2]) if name == "unit_attack_unit" else enemy_buildings.get(action[2])
+                        valid_target = target is not None
+                        if valid_target:
+                            x, y = target.x, target.y
+
+                    res = (
+                        unit is not None and valid_target
+                        and unit.turn_actions_remaining > 0
+                        and self.get_chebyshev_distance(unit.x, unit.y, x, y) <= unit.attack_range
+                    )
+                    if res:
+                        self.__resolve_unit_attack(unit, x, y)
+
+                elif name == "spawn_unit":
+                    unit_type, building = action[1], ally_buildings.get(action[2])
+                    res = building is not None and self.__can_spawn_from(unit_type, building)
+                    if res and game_state.place_unit(team, unit_type, building.x, building.y):
+                        game_state.balance[team] -= unit_type.cost
+
+                elif name == "build_building":
+                    building_type, x, y = action[1], action[2], action[3]
+                    res = game_map.in_bounds(x, y) and self.can_build_building(building_type, x, y)
+                    if res and game_state.place_building(team, building_type, x, y):
+                        game_state.balance[team] -= building_type.cost
+
+                else:
+                    res = getattr(self, name)(*action[1:])
+
+            except (GameException, IndexError, TypeError, AttributeError):
+                res = False
+
+            results.append(res)
+
+        return results
     
 
     '''
@@ -1002,16 +1258,11 @@ class RobotController:
     def can_explore(self, explorer_unit_id: int, explore_building_id: int) -> bool:
         '''Returns True if unit is an explorer on an exploration building, False otherwise'''
 
-        if explorer_unit_id not in self.__game_state.units[self.__team]:
+        explorer = self.__team_unit(explorer_unit_id, self.__team)
+        if explorer is None:
             print("can_explore(): invalid explorer_unit_id")
             return False
 
-        explorer = self.__game_state.get_unit_from_id(explorer_unit_id)
-        
-        #basic validity
-        if explorer is None:
-            return False
-        
         if explorer.type != UnitType.EXPLORER:
             return False
         
@@ -1066,17 +1317,13 @@ class RobotController:
             return False
         
 
-        if target_unit_id not in self.__game_state.units[self.__team]:
+        unit = self.__team_unit(target_unit_id, self.__team)
+        if unit is None:
             print("explore_for_health(): invalid target_unit_id")
             return False
 
-        unit = self.__game_state.get_unit_from_id(target_unit_id)
-        
-        #basic validity
-        if unit is None:
-            return False
-        
         unit.health = math.ceil(unit.type.health * 1.5)
+        self.__game_state.notify('unit_updated', unit)
 
         return True
         
@@ -1095,17 +1342,13 @@ class RobotController:
             return False
         
 
-        if target_unit_id not in self.__game_state.units[self.__team]:
+        unit = self.__team_unit(target_unit_id, self.__team)
+        if unit is None:
             print("explore_for_health(): invalid target_unit_id")
             return False
 
-        unit = self.__game_state.get_unit_from_id(target_unit_id)
-        
-        #basic validity
-        if unit is None:
-            return False
-        
         unit.damage += 2
+        self.__game_state.notify('unit_updated', unit)
 
         return True
 
@@ -1122,17 +1365,13 @@ class RobotController:
             return False
         
 
-        if target_unit_id not in self.__game_state.units[self.__team]:
+        unit = self.__team_unit(target_unit_id, self.__team)
+        if unit is None:
             print("explore_for_health(): invalid target_unit_id")
             return False
 
-        unit = self.__game_state.get_unit_from_id(target_unit_id)
-        
-        #basic validity
-        if unit is None:
-            return False
-        
         unit.defense += 2
+        self.__game_state.notify('unit_updated', unit)
 
         return True
 
@@ -1149,17 +1388,11 @@ class RobotController:
         """
         # Ensure unit ID is valid and of type Engineer
         # are ids valid?
-        if engineer_id not in self.__game_state.units[self.__team]:
+        engineer = self.__team_unit(engineer_id, self.__team)
+        if engineer is None:
             print("can_build_bridge(): invalid engineer_id")
             return False
-        
-        engineer = self.__game_state.get_unit_from_id(engineer_id)
 
-        # basic validity
-        if engineer is None:
-            print('can_build_bridge(): invalid attacking unit id')
-            return False
-        
         #robustly checks ally team control, but is tested for in the first check
         if engineer.team != self.__team:
             print('can_build_bridge(): can only control ally engineers')
@@ -1186,6 +1419,7 @@ class RobotController:
 
         # Change the tile to BRIDGE
         self.__game_state.map.tiles[engineer.x][engineer.y] = Tile.BRIDGE
+        self.__game_state.notify('tile_changed', engineer.x, engineer.y)
 
         # Record the map change
         self.__game_state.changed_maps.append(self.__game_state.map.to_2d_list())
@@ -1212,28 +1446,16 @@ class RobotController:
         '''
 
         # are ids valid?
-        if healer_id not in self.__game_state.units[self.__team]:
+        healer_unit = self.__team_unit(healer_id, self.__team)
+        if healer_unit is None:
             print("can_heal_unit(): invalid attacking_unit_id")
             return False
         
-        if target_unit_id not in self.__game_state.units[self.__team]:
+        target_unit = self.__team_unit(target_unit_id, self.__team)
+        if target_unit is None:
             print("can_heal_unit(): invalid target_unit_id")
             return False
 
-
-
-        healer_unit = self.__game_state.get_unit_from_id(healer_id)
-        target_unit = self.__game_state.get_unit_from_id(target_unit_id)
-
-        # basic validity
-        if healer_unit is None:
-            print('can_heal_unit(): invalid attacking unit id')
-            return False
-        
-        if target_unit is None:
-            print('can_heal_unit(): invalid target unit id')
-            return False
-        
         #is the healer_unit a healer?
         if healer_unit.type not in self.__game_state.HEALERS:
             return False
@@ -1257,32 +1479,24 @@ class RobotController:
         '''
         
         # are ids valid?
-        if healer_id not in self.__game_state.units[self.__team]:
+        healer_unit = self.__team_unit(healer_id, self.__team)
+        if healer_unit is None:
             print("can_heal_unit(): invalid attacking_unit_id")
             return False
         
-        if target_unit_id not in self.__game_state.units[self.__team]:
+        target_unit = self.__team_unit(target_unit_id, self.__team)
+        if target_unit is None:
             print("can_heal_unit(): invalid target_unit_id")
             return False
 
-
-        healer_unit = self.__game_state.get_unit_from_id(healer_id)
-        target_unit = self.__game_state.get_unit_from_id(target_unit_id)
-
-        # basic validity
-        if healer_unit is None:
-            print('can_heal_unit(): invalid attacking unit id')
-            return False
-        
-        if target_unit is None:
-            print('can_heal_unit(): invalid target unit id')
-            return False
-        
         #unit actions per turn decrement
         healer_unit.turn_actions_remaining -= 1
 
         #heal, can only heal until full health
         target_unit.health = min(target_unit.type.health, target_unit.health + healer_unit.type.heal_amount)
+
+        self.__game_state.notify('unit_updated', healer_unit)
+        self.__game_state.notify('unit_updated', target_unit)
     
 
     '''
@@ -1295,11 +1509,11 @@ class RobotController:
         Checks if the specified unit is a Rat and if it can harm farming resources.
         Checks if the ally farm_id is specified
         '''
-        if rat_id not in self.__game_state.units[self.__team]:
+        rat_unit = self.__team_unit(rat_id, self.__team)
+        if rat_unit is None:
             print("can_harm_farm(): invalid rat_id")
             return False
 
-        rat_unit = self.__game_state.get_unit_from_id(rat_id)
 
         farm_building = self.get_building_from_id(farm_id)
         if farm_building is None:
@@ -1345,3 +1559,114 @@ class RobotController:
     def get_time_remaining(self) -> Dict:
         return {team.name: time for team, time in copy.deepcopy(self.__game_state.time_remaining).items()}
 
+
+    '''
+    ----------
+    Scheduling
+    ----------
+    '''
+
+    def sleep_until(self, turn: int, wake_radius: Optional[int] = None) -> bool:
+        '''
+        Tells the engine not to call your bot again until the given turn, saving the time it would spend.
+        You are woken up earlier if one of your units or buildings is damaged or removed, or, with a wake_radius,
+        if an enemy unit is spawned or moves within wake_radius (Chebyshev distance) of one of your units or buildings.
+
+        Returns True if the bot will sleep, False if turn is not in the future
+        '''
+
+        if turn <= self.__game_state.turn:
+            return False
+
+        self.wake()
+        self.__sleep = SleepWatch(self.__game_state, self.__team, turn, wake_radius)
+        self.__game_state.add_listener(self.__sleep)
+        return True
+
+
+    def is_sleeping(self) -> bool:
+        '''Returns True if the bot is asleep this turn (see sleep_until); wakes it up if it is time'''
+
+        if self.__sleep is None:
+            return False
+
+        if self.__sleep.woken or self.__game_state.turn >= self.__sleep.wake_turn:
+            self.wake()
+            return False
+
+        return True
+
+
+    def wake(self):
+        '''Cancels sleep_until'''
+
+        if self.__sleep is not None:
+            self.__game_state.remove_listener(self.__sleep)
+            self.__sleep = None
+
+
+    '''
+    -------------------
+    Event Subscriptions
+    -------------------
+    '''
+
+    def __subscribe(self, event_type: EventType, team: Optional[Team] = None, x: int = 0, y: int = 0, radius: int = 0) -> int:
+        if self.__events is None:
+            self.__events = EventWatch(self.__game_state, self.__team)
+            self.__game_state.add_listener(self.__events)
+
+        return self.__events.subscribe(event_type, team, x, y, radius)
+
+
+    def subscribe_enemy_in_radius(self, x: int, y: int, radius: int) -> int:
+        '''
+        Fires an ENEMY_IN_RADIUS event whenever an enemy unit is spawned within, or moves into, the chebyshev radius of (x, y)
+        Returns the subscription id
+        '''
+
+        if radius < 0:
+            raise GameException("Radius must be non-negative")
+
+        return self.__subscribe(EventType.ENEMY_IN_RADIUS, x=x, y=y, radius=radius)
+
+
+    def subscribe_unit_killed(self, team: Optional[Team] = None) -> int:
+        '''Fires a UNIT_KILLED event whenever a unit of team (of either team if None) dies. Returns the subscription id'''
+        return self.__subscribe(EventType.UNIT_KILLED, team)
+
+
+    def subscribe_building_damaged(self, team: Optional[Team] = None) -> int:
+        '''Fires a BUILDING_DAMAGED event whenever a building of team (of either team if None) is damaged. Returns the subscription id'''
+        return self.__subscribe(EventType.BUILDING_DAMAGED, team)
+
+
+    def subscribe_building_destroyed(self, team: Optional[Team] = None) -> int:
+        '''Fires a BUILDING_DESTROYED event whenever a building of team (of either team if None) is destroyed. Returns the subscription id'''
+        return self.__subscribe(EventType.BUILDING_DESTROYED, team)
+
+
+    def subscribe_bridge_built(self) -> int:
+        '''Fires a BRIDGE_BUILT event whenever either team builds a bridge. Returns the subscription id'''
+        return self.__subscribe(EventType.BRIDGE_BUILT)
+
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        '''Cancels a subscription. Returns True if it existed'''
+
+        if self.__events is None:
+            return False
+
+        return self.__events.unsubscribe(subscription_id)
+
+
+    def get_events(self) -> List[Event]:
+        '''
+        Returns the events fired since the last call (ie since your previous turn), oldest first, and clears them
+        '''
+
+        if self.__events is None:
+            return []
+
+        return self.__events.pop_events()
+
@@ -0,0 +1,223 @@
+''' encodes the game state as dense NumPy planes, kept up to date incrementally from the game state's mutations '''
+
+from typing import Dict, List
+
+import numpy as np
+
+from src.buildings import Building
+from src.game_constants import Team, Tile, UnitType, BuildingType
+from src.game_state import GameState
+from src.robot_controller import RobotController
+from src.state_listener import GameStateListener
+from src.units import Unit
+
+
+TILES: List[Tile] = list(Tile)
+UNIT_TYPES: List[UnitType] = list(UnitType)
+BUILDING_TYPES: List[BuildingType] = list(BuildingType)
+
+# per team channels, in order
+TEAM_CHANNELS: List[str] = (
+    [f'unit_{unit_type.name}' for unit_type in UNIT_TYPES]
+    + ['unit_health', 'unit_actions', 'unit_movement']
+    + [f'building_{building_type.name}' for building_type in BUILDING_TYPES]
+    + ['building_health', 'building_actions', 'castle']
+)
+
+
+class StateEncoder(GameStateListener):
+    '''
+    Dense float32 planes of shape (channels, map width, map height), indexed planes[c][x][y]:
+
+      - tile_<TILE>                  one-hot tile type (shared by both teams)
+      - <TEAM>/unit_<UNIT TYPE>      one-hot unit type
+      - <TEAM>/unit_health, <TEAM>/unit_actions, <TEAM>/unit_movement
+      - <TEAM>/building_<BUILDING TYPE>
+      - <TEAM>/building_health, <TEAM>/building_actions
+      - <TEAM>/castle                1 at the main castle's location
+
+    The encoder registers itself as a listener of the game state and only rewrites the cells that
+    a mutation touched, so reading the planes costs nothing and keeping them current costs
+    microseconds per action instead of a to_dict() per turn.
+    '''
+
+    def __init__(self, game_state: GameState):
+        self.game_state = game_state
+        self.width = game_state.map.width
+        self.height = game_state.map.height
+
+        self.channels: Dict[str, int] = {}
+        for tile in TILES:
+            self.channels[f'tile_{tile.name}'] = len(self.channels)
+        for team in Team:
+            for name in TEAM_CHANNELS:
+                self.channels[f'{team.name}/{name}'] = len(self.channels)
+
+        #{team: {team channel name: index}}, to avoid building channel names on every update
+        self.team_channels = {team: {name: self.channels[f'{team.name}/{name}'] for name in TEAM_CHANNELS} for team in Team}
+
+        self.planes = np.zeros((len(self.channels), self.width, self.height), dtype=np.float32)
+
+        #per team (start, stop) channel ranges of the unit and building channels, for clearing a cell
+        self.unit_channels = {team: self.channel_range(team, 'unit_') for team in Team}
+        self.building_channels = {team: self.channel_range(team, 'building_') for team in Team}
+
+        #per turn actions/movement of each occupied cell, copied back in when a turn starts
+        self.unit_turn_actions = {team: np.zeros((self.width, self.height), dtype=np.float32) for team in Team}
+        self.unit_turn_movement = {team: np.zeros((self.width, self.height), dtype=np.float32) for team in Team}
+        self.building_turn_actions = {team: np.zeros((self.width, self.height), dtype=np.float32) for team in Team}
+
+        self.rebuild()
+        game_state.add_listener(self)
+
+
+    def channel_range(self, team: Team, prefix: str) -> slice:
+        indices = [index for name, index in self.channels.items() if name.startswith(f'{team.name}/{prefix}')]
+        return slice(min(indices), max(indices) + 1)
+
+
+    def channel(self, team: Team, name: str) -> int:
+        return self.team_channels[team][name]
+
+
+    def rebuild(self):
+        '''Encodes the whole game state from scratch'''
+
+        self.planes.fill(0)
+        for team in Team:
+            self.unit_turn_actions[team].fill(0)
+            self.unit_turn_movement[team].fill(0)
+            self.building_turn_actions[team].fill(0)
+
+        for x in range(self.width):
+            for y in range(self.height):
+                self.tile_changed(x, y)
+
+        for team in Team:
+            for unit in self.game_state.units[team].values():
+                self.unit_added(unit)
+            for building in self.game_state.buildings[team].values():
+                self.building_added(building)
+
+
+    def detach(self):
+        '''Stops following the game state'''
+        self.game_state.remove_listener(self)
+
+
+    '''
+    ------------
+    Observations
+    ------------
+    '''
+
+    def observe(self, team: Team, copy: bool = True) -> np.ndarray:
+        '''
+        Returns the planes from the perspective of a team: tile channels, then the team's own channels,
+        then the enemy's channels. With copy=False, blue's view is the live planes array (no copy).
+        '''
+
+        if team == Team.BLUE:
+            return self.planes.copy() if copy else self.planes
+
+        num_tiles = len(TILES)
+        num_team = len(TEAM_CHANNELS)
+        order = np.r_[0:num_tiles, num_tiles + num_team:num_tiles + 2 * num_team, num_tiles:num_tiles + num_team]
+        return self.planes[order]
+
+
+    '''
+    -------------------------------------
+    GameStateListener (incremental update)
+    -------------------------------------
+    '''
+
+    def write_unit(self, unit: Unit):
+        x, y, team = unit.x, unit.y, unit.team
+        planes = self.planes
+        channels = self.team_channels[team]
+
+        planes[self.unit_channels[team], x, y] = 0
+        planes[channels[f'unit_{unit.type.name}'], x, y] = 1
+        planes[channels['unit_health'], x, y] = unit.health
+        planes[channels['unit_actions'], x, y] = unit.turn_actions_remaining
+        planes[channels['unit_movement'], x, y] = unit.turn_movement_remaining
+
+        self.unit_turn_actions[team][x, y] = unit.type.actions_per_turn
+        self.unit_turn_movement[team][x, y] = unit.type.move_range
+
+
+    def clear_unit(self, team: Team, x: int, y: int):
+        self.planes[self.unit_channels[team], x, y] = 0
+        self.unit_turn_actions[team][x, y] = 0
+        self.unit_turn_movement[team][x, y] = 0
+
+
+    def write_building(self, building: Building):
+        x, y, team = building.x, building.y, building.team
+        planes = self.planes
+        channels = self.team_channels[team]
+
+        planes[self.building_channels[team], x, y] = 0
+        planes[channels[f'building_{building.type.name}'], x, y] = 1
+        planes[channels['building_health'], x, y] = building.health
+        planes[channels['building_actions'], x, y] = building.turn_actions_remaining
+
+        self.building_turn_actions[team][x, y] = building.type.actions_per_turn
+
+        if building.id == self.game_state.main_castle_ids[team]:
+            planes[self.channel(team, 'castle'), x, y] = 1
+
+
+    def unit_added(self, unit: Unit):
+        self.write_unit(unit)
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        self.clear_unit(unit.team, old_x, old_y)
+        self.write_unit(unit)
+
+    def unit_updated(self, unit: Unit):
+        self.write_unit(unit)
+
+    def unit_removed(self, unit: Unit):
+        self.clear_unit(unit.team, unit.x, unit.y)
+
+    def building_added(self, building: Building):
+        self.write_building(building)
+
+    def building_updated(self, building: Building):
+        self.write_building(building)
+
+    def building_removed(self, building: Building):
+        x, y, team = building.x, building.y, building.team
+        self.planes[self.building_channels[team], x, y] = 0
+        self.planes[self.channel(team, 'castle'), x, y] = 0
+        self.building_turn_actions[team][x, y] = 0
+
+    def tile_changed(self, x: int, y: int):
+        self.planes[0:len(TILES), x, y] = 0
+        self.planes[TILES.index(self.game_state.map.tiles[x][y]), x, y] = 1
+
+    def turn_started(self, turn: int):
+        #every unit's and building's actions and movement are reset to their type's per turn values
+        for team in Team:
+            self.planes[self.channel(team, 'unit_actions')] = self.unit_turn_actions[team]
+            self.planes[self.channel(team, 'unit_movement')] = self.unit_turn_movement[team]
+            self.planes[self.channel(team, 'building_actions')] = self.building_turn_actions[team]
+
+
+    @staticmethod
+    def of(game_state: GameState) -> 'StateEncoder':
+        '''Returns the encoder following game_state, attaching a new one if there is none'''
+
+        for listener in game_state.listeners:
+            if isinstance(listener, StateEncoder):
+                return listener
+
+        return StateEncoder(game_state)
+
+
+
+def tensor_observation(game_state: GameState, controller: RobotController) -> np.ndarray:
+    '''Observation function for src/environment.py: the encoded planes from the agent's perspective'''
+    return StateEncoder.of(game_state).observe(controller.get_ally_team())
@@ -0,0 +1,82 @@
+''' interface for objects that follow game state mutations incrementally (encoders, indexes, renderers, etc.) '''
+
+from src.units import Unit
+from src.buildings import Building
+
+
+class GameStateListener:
+    '''
+    Listeners are registered with GameState.add_listener and are notified right after each mutation
+    of the game state (before it, for removals). Every method is a no-op here, so a listener only
+    overrides what it needs.
+
+    NOTE: listeners must not mutate the game state themselves
+    '''
+
+    def unit_added(self, unit: Unit):
+        '''A unit was placed or spawned'''
+        pass
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        '''A unit moved from (old_x, old_y) to (unit.x, unit.y)'''
+        pass
+
+    def unit_updated(self, unit: Unit):
+        '''A unit's health, stats, actions or movement remaining changed'''
+        pass
+
+    def unit_removed(self, unit: Unit):
+        '''A unit is about to be removed (killed, sold or disbanded)'''
+        pass
+
+    def building_added(self, building: Building):
+        '''A building was built'''
+        pass
+
+    def building_updated(self, building: Building):
+        '''A building's health or actions remaining changed'''
+        pass
+
+    def building_removed(self, building: Building):
+        '''A building is about to be removed (destroyed or sold)'''
+        pass
+
+    def tile_changed(self, x: int, y: int):
+        '''The map tile at (x, y) changed (ie a bridge was built)'''
+        pass
+
+    def turn_started(self, turn: int):
+        '''A new turn started; every unit's and building's actions and movement were reset'''
+        pass
+
+
+
+class MutationCounter(GameStateListener):
+    '''Counts every mutation of the game state except turn starts, ie to tell whether the bots changed anything'''
+
+    def __init__(self):
+        self.mutations = 0
+
+    def unit_added(self, unit: Unit):
+        self.mutations += 1
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        self.mutations += 1
+
+    def unit_updated(self, unit: Unit):
+        self.mutations += 1
+
+    def unit_removed(self, unit: Unit):
+        self.mutations += 1
+
+    def building_added(self, building: Building):
+        self.mutations += 1
+
+    def building_updated(self, building: Building):
+        self.mutations += 1
+
+    def building_removed(self, building: Building):
+        self.mutations += 1
+
+    def tile_changed(self, x: int, y: int):
+        self.mutations += 1
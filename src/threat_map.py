@@ -0,0 +1,108 @@
+''' per team threat maps: the damage enemy units could deal to every cell next turn, kept up to date incrementally '''
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.game_constants import Team
+from src.game_state import GameState
+from src.state_listener import GameStateListener
+from src.units import Unit
+
+
+class ThreatMap(GameStateListener):
+    '''
+    int32 grids of shape (map width, map height), indexed threat[team][x][y]: the summed damage the units of
+    team's enemy could deal to (x, y) next turn
+
+    A unit threatens every cell within Chebyshev distance move_range + attack_range + damage_range of it, with
+    damage x actions_per_turn. Terrain and blocking are ignored, so this is an upper bound: a cell at 0 is safe.
+
+    Each unit's contribution is added to the window around it when it spawns, moved along with it and
+    subtracted when it dies (or when its damage changes), so a mutation costs one slice update.
+    '''
+
+    def __init__(self, game_state: GameState):
+        self.game_state = game_state
+
+        shape = (game_state.map.width, game_state.map.height)
+        self.threat: Dict[Team, np.ndarray] = {team: np.zeros(shape, dtype=np.int32) for team in Team}
+
+        #unit id -> (x, y, reach, damage) added for it, so exactly that is subtracted later
+        self.contributions: Dict[int, Tuple[int, int, int, int]] = {}
+
+        self.rebuild()
+        game_state.add_listener(self)
+
+
+    def rebuild(self):
+        '''Computes the grids from scratch'''
+
+        for grid in self.threat.values():
+            grid.fill(0)
+        self.contributions.clear()
+
+        for team in Team:
+            for unit in self.game_state.units[team].values():
+                self.add(unit)
+
+
+    def detach(self):
+        '''Stops following the game state'''
+        self.game_state.remove_listener(self)
+
+
+    def snapshot(self, team: Team) -> np.ndarray:
+        '''
+        A read-only copy of the threat grid of team, handed out to bots
+        (a view would let a bot make it writeable again and change the engine's grid)
+        '''
+        grid = self.threat[team].copy()
+        grid.flags.writeable = False
+        return grid
+
+
+    def add(self, unit: Unit):
+        damage = unit.damage * unit.type.actions_per_turn
+        if damage <= 0:
+            return
+
+        reach = unit.type.move_range + unit.attack_range + unit.damage_range
+        self.contributions[unit.id] = (unit.x, unit.y, reach, damage)
+        self.apply(self.game_state.get_opposite_team(unit.team), unit.x, unit.y, reach, damage)
+
+
+    def remove(self, unit: Unit):
+        contribution = self.contributions.pop(unit.id, None)
+        if contribution is not None:
+            x, y, reach, damage = contribution
+            self.apply(self.game_state.get_opposite_team(unit.team), x, y, reach, -damage)
+
+
+    def apply(self, team: Team, x: int, y: int, reach: int, damage: int):
+        self.threat[team][max(x - reach, 0) : x + reach + 1, max(y - reach, 0) : y + reach + 1] += damage
+
+
+    '''
+    -------------------------------------
+    GameStateListener (incremental update)
+    -------------------------------------
+    '''
+
+    def unit_added(self, unit: Unit):
+        self.add(unit)
+
+    def unit_moved(self, unit: Unit, old_x: int, old_y: int):
+        self.remove(unit)
+        self.add(unit)
+
+    def unit_updated(self, unit: Unit):
+        #only a change of damage (ie explore_for_attack) moves the threat
+        contribution = self.contributions.get(unit.id)
+        added = 0 if contribution is None else contribution[3]
+        if added != max(unit.damage * unit.type.actions_per_turn, 0):
+            self.remove(unit)
+            self.add(unit)
+
+    def unit_removed(self, unit: Unit):
+        self.remove(unit)
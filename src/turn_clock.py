@@ -0,0 +1,16 @@
+''' shared turn counter that lets units and buildings reset their per turn counters lazily '''
+
+
+class TurnClock:
+    '''
+    The current turn of a game, shared by the game state with every unit and building it creates
+
+    A unit's actions/movement remaining are stamped with the turn they were last written in; when the
+    clock has moved past that stamp, they read as the type's per turn values. Advancing the clock is
+    therefore all it takes to reset every unit and building at the start of a turn.
+    '''
+
+    __slots__ = ('turn',)
+
+    def __init__(self, turn: int = 0):
+        self.turn = turn
@@ -1,6 +1,9 @@
 ''' contains unit classes (soldiers, farmers, builders, etc.) '''
 
+from typing import Optional
+
 from src.game_constants import GameConstants, UnitType, Team, UnitRender
+from src.turn_clock import TurnClock
 
 class Unit:
     '''
@@ -10,10 +13,15 @@ class Unit:
 
     #ID for participants to interface through instead of through the actual object for safety
     id_counter = 0
+
+    #no per instance __dict__: large armies are cheaper to hold, copy and serialize
+    __slots__ = ('id', 'team', 'type', 'x', 'y', '_turn_actions_remaining', '_turn_movement_remaining', 'turn_stamp', 'clock',
+                 'attack_range', 'health', 'damage', 'defense', 'damage_range', 'level')
     
-    def __init__(self, team: Team, type: UnitType, x: int, y: int, level: int = 1):
+    def __init__(self, team: Team, type: UnitType, x: int, y: int, level: int = 1, id: Optional[int] = None, clock: Optional[TurnClock] = None):
 
-        self.id = self.increment()
+        #the game state hands out ids per game so that they are reproducible; fall back on the global counter
+        self.id = self.increment() if id is None else id
 
         self.team = team
         self.type = type
@@ -21,8 +29,11 @@ class Unit:
         self.y = y
 
         #cannot move and cannot act the turn of its spawn
-        self.turn_actions_remaining = 0
-        self.turn_movement_remaining = 0
+        #with a clock (given by the game state), both reset to the type's per turn values once the turn changes
+        self.clock = clock
+        self.turn_stamp = None if clock is None else clock.turn
+        self._turn_actions_remaining = 0
+        self._turn_movement_remaining = 0
 
         self.attack_range = type.attack_range
 
@@ -33,7 +44,50 @@ class Unit:
 
         self.level = level
 
-        self.walkable_tiles = self.type.walkable_tiles
+    @property
+    def walkable_tiles(self):
+        #shared by every unit of a type, so it is read from the type instead of stored per unit
+        return self.type.walkable_tiles
+
+    def refresh_turn(self):
+        '''Resets actions and movement remaining if the clock has moved on since they were last written'''
+        if self.clock is not None and self.turn_stamp != self.clock.turn:
+            self.turn_stamp = self.clock.turn
+            self._turn_actions_remaining = self.type.actions_per_turn
+            self._turn_movement_remaining = self.type.move_range
+
+    @property
+    def turn_actions_remaining(self) -> int:
+        self.refresh_turn()
+        return self._turn_actions_remaining
+
+    @turn_actions_remaining.setter
+    def turn_actions_remaining(self, value: int):
+        self.refresh_turn()
+        self._turn_actions_remaining = value
+
+    @property
+    def turn_movement_remaining(self) -> int:
+        self.refresh_turn()
+        return self._turn_movement_remaining
+
+    @turn_movement_remaining.setter
+    def turn_movement_remaining(self, value: int):
+        self.refresh_turn()
+        self._turn_movement_remaining = value
+
+    def __copy__(self) -> 'Unit':
+        self.refresh_turn()
+        clone = self.__class__.__new__(self.__class__)
+        for name in Unit.__slots__:
+            setattr(clone, name, getattr(self, name))
+        #a copy is a snapshot: its counters do not reset with the game's turns
+        clone.clock = None
+        return clone
+
+    def __deepcopy__(self, memo) -> 'Unit':
+        #every field but the clock (dropped by __copy__) is an int or an enum member, so a shallow copy is already a deep copy
+        return self.__copy__()
 
     @staticmethod
     def increment() -> int:
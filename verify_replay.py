@@ -0,0 +1,40 @@
+from argparse import ArgumentParser
+import time
+
+from src.action_log import load_action_log, resimulate, verify
+
+"""
+Re-simulates a game from its action log (run_game.py --action_log) without running the bots,
+and checks it against the game's replay if given
+Sample usage: python3 verify_replay.py replays/game_actions.awap25a -r replays/game_replay.awap25r
+"""
+def main():
+
+    parser = ArgumentParser()
+
+    parser.add_argument("action_log", type=str)
+
+    parser.add_argument(
+        "-r", "--replay_file", type=str, required=False, default=None,
+        help="Replay of the same game to compare every turn against",
+    )
+
+    args = parser.parse_args()
+
+    action_log = load_action_log(args.action_log)
+    print(f"{len(action_log['actions'])} actions over {action_log['turns']} turns")
+
+    if args.replay_file is None:
+        start_time = time.perf_counter()
+        game_state = resimulate(action_log)
+        print(f"Re-simulated {game_state.turn} turns in {time.perf_counter() - start_time:.2f}s, winner: {game_state.get_winner().name}")
+        return
+
+    matched, result = verify(action_log, args.replay_file)
+    print(result)
+    if not matched:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()